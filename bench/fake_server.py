@@ -0,0 +1,543 @@
+import json
+import time
+import base64
+import random
+import hashlib
+import argparse
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+# --------------------------------------------------
+# Lokale stand-in voor Bluesky (PDS + AppView) voor benchmarks.
+# Alles is synthetisch en deterministisch per seed: elke actor / feed / lijst bestaat,
+# de inhoud wordt bij de eerste vraag gegenereerd.
+# --------------------------------------------------
+
+
+@dataclass
+class FakeConfig:
+    """
+    Grootte en karakter van de synthetische data, plus server-gedrag.
+    media_mix: verhouding tussen images / video / external (met thumb) / alleen tekst.
+    rate_limit_requests: max requests per account per rate_limit_window seconden (0 = uit).
+    """
+    seed: int = 1
+    posts_per_author: int = 200
+    feed_size: int = 300
+    list_members: int = 60
+    media_mix: Dict[str, float] = field(
+        default_factory=lambda: {"images": 0.55, "video": 0.15, "external": 0.1, "text": 0.2}
+    )
+    quote_ratio: float = 0.1
+    repost_ratio: float = 0.1
+    latency_ms: float = 0.0
+    latency_jitter_ms: float = 0.0
+    rate_limit_requests: int = 0
+    rate_limit_window: float = 60.0
+
+
+# --------------------------------------------------
+# Synthetische data
+# --------------------------------------------------
+def _seeded(config: FakeConfig, *parts: str) -> random.Random:
+    digest = hashlib.sha256("|".join([str(config.seed), *parts]).encode()).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def _did_for(actor: str) -> str:
+    if actor.startswith("did:"):
+        return actor
+    return "did:plc:" + hashlib.sha256(actor.lower().encode()).hexdigest()[:24]
+
+
+def _handle_for(actor: str) -> str:
+    if not actor.startswith("did:"):
+        return actor.lower()
+    return actor.rsplit(":", 1)[-1][:12] + ".fake.test"
+
+
+def _profile(actor: str) -> Dict[str, Any]:
+    return {"did": _did_for(actor), "handle": _handle_for(actor)}
+
+
+def _ts(seconds_ago: float) -> str:
+    t = time.gmtime(time.time() - seconds_ago)
+    return time.strftime("%Y-%m-%dT%H:%M:%S.000Z", t)
+
+
+def _media_embed(kind: str, uri: str) -> Optional[Dict[str, Any]]:
+    if kind == "images":
+        return {
+            "$type": "app.bsky.embed.images#view",
+            "images": [{"thumb": f"https://cdn.fake.test/{uri[-8:]}/t", "fullsize": f"https://cdn.fake.test/{uri[-8:]}/f", "alt": ""}],
+        }
+    if kind == "video":
+        return {"$type": "app.bsky.embed.video#view", "cid": "bafyvideo", "playlist": "https://video.fake.test/p.m3u8"}
+    if kind == "external":
+        return {
+            "$type": "app.bsky.embed.external#view",
+            "external": {"uri": "https://example.com", "title": "t", "description": "d", "thumb": "https://cdn.fake.test/ext"},
+        }
+    return None
+
+
+def _pick_kind(rng: random.Random, mix: Dict[str, float]) -> str:
+    kinds = list(mix)
+    return rng.choices(kinds, weights=[mix[k] for k in kinds])[0]
+
+
+def make_post(config: FakeConfig, actor: str, i: int) -> Dict[str, Any]:
+    """Post i van actor (0 = nieuwste); zelfde seed -> zelfde post."""
+    rng = _seeded(config, "post", actor.lower(), str(i))
+    did = _did_for(actor)
+    uri = f"at://{did}/app.bsky.feed.post/{i:010d}"
+    post: Dict[str, Any] = {
+        "uri": uri,
+        "cid": "bafy" + hashlib.sha256(uri.encode()).hexdigest()[:32],
+        "author": _profile(actor),
+        "record": {"$type": "app.bsky.feed.post", "text": f"post {i}", "createdAt": _ts(i * 600)},
+        "indexedAt": _ts(i * 600),
+        "likeCount": rng.randint(0, 50),
+        "repostCount": rng.randint(0, 10),
+    }
+    media = _media_embed(_pick_kind(rng, config.media_mix), uri)
+    if rng.random() < config.quote_ratio:
+        quoted = {"$type": "app.bsky.embed.record#viewNotFound", "uri": f"at://{did}/app.bsky.feed.post/q{i}", "notFound": True}
+        if media:
+            post["embed"] = {"$type": "app.bsky.embed.recordWithMedia#view", "record": {"record": quoted}, "media": media}
+        else:
+            post["embed"] = {"$type": "app.bsky.embed.record#view", "record": quoted}
+    elif media:
+        post["embed"] = media
+    return post
+
+
+def make_feed_item(config: FakeConfig, actor: str, i: int) -> Dict[str, Any]:
+    """Item i van de author feed van actor; een deel zijn reposts van andere accounts."""
+    rng = _seeded(config, "item", actor.lower(), str(i))
+    if rng.random() < config.repost_ratio:
+        other = f"other{rng.randint(0, 999)}.fake.test"
+        return {
+            "post": make_post(config, other, i),
+            "reason": {"$type": "app.bsky.feed.defs#reasonRepost", "by": _profile(actor), "indexedAt": _ts(i * 600)},
+        }
+    return {"post": make_post(config, actor, i)}
+
+
+def list_member_handle(i: int) -> str:
+    return f"member{i:04d}.fake.test"
+
+
+# --------------------------------------------------
+# Server
+# --------------------------------------------------
+class FakeState:
+    """Wat de server bijhoudt: reposts/likes per account, tellers en rate-limit vensters."""
+
+    def __init__(self, config: FakeConfig) -> None:
+        self.config = config
+        self.lock = threading.Lock()
+        self.records: Dict[Tuple[str, str, str], str] = {}  # (did, collection, subject) -> record uri
+        self.rkeys: Dict[Tuple[str, str], Tuple[str, str]] = {}  # (did, rkey) -> (collection, subject)
+        self.next_rkey = 0
+        self.requests: Counter = Counter()
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.rate_limited = 0
+        self.windows: Dict[str, Tuple[float, int]] = {}
+        self.handles: Dict[str, str] = {}  # did -> handle, gezien via getProfiles
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "requests": dict(self.requests),
+                "total_requests": sum(self.requests.values()),
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "rate_limited": self.rate_limited,
+            }
+
+    def reset_counters(self) -> None:
+        with self.lock:
+            self.requests.clear()
+            self.bytes_in = self.bytes_out = self.rate_limited = 0
+
+    # ---- rate limit ----
+    def take(self, who: str) -> Optional[Dict[str, str]]:
+        """None als rate limiting uit staat, anders de ratelimit-* headers (+ "exceeded")."""
+        limit = self.config.rate_limit_requests
+        if not limit:
+            return None
+        now = time.time()
+        with self.lock:
+            start, used = self.windows.get(who, (now, 0))
+            if now - start >= self.config.rate_limit_window:
+                start, used = now, 0
+            used += 1
+            self.windows[who] = (start, used)
+            headers = {
+                "ratelimit-limit": str(limit),
+                "ratelimit-remaining": str(max(0, limit - used)),
+                "ratelimit-reset": str(int(start + self.config.rate_limit_window)),
+                "ratelimit-policy": f"{limit};w={int(self.config.rate_limit_window)}",
+            }
+            if used > limit:
+                self.rate_limited += 1
+                headers["exceeded"] = "1"
+            return headers
+
+    # ---- records ----
+    def create(self, did: str, collection: str, subject: str) -> Dict[str, str]:
+        with self.lock:
+            self.next_rkey += 1
+            rkey = f"3fake{self.next_rkey:08d}"
+            uri = f"at://{did}/{collection}/{rkey}"
+            self.records[(did, collection, subject)] = uri
+            self.rkeys[(did, rkey)] = (collection, subject)
+        return {"uri": uri, "cid": "bafyrec" + rkey}
+
+    def delete(self, did: str, rkey: str) -> None:
+        with self.lock:
+            key = self.rkeys.pop((did, rkey), None)
+            if key:
+                self.records.pop((did, *key), None)
+
+    def viewer(self, did: Optional[str], subject: str) -> Dict[str, str]:
+        if not did:
+            return {}
+        out = {}
+        with self.lock:
+            repost = self.records.get((did, "app.bsky.feed.repost", subject))
+            like = self.records.get((did, "app.bsky.feed.like", subject))
+        if repost:
+            out["repost"] = repost
+        if like:
+            out["like"] = like
+        return out
+
+
+def _jwt(did: str, scope: str, ttl: int) -> str:
+    def b64(obj: Dict[str, Any]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(obj).encode()).rstrip(b"=").decode()
+
+    now = int(time.time())
+    return ".".join([b64({"alg": "HS256", "typ": "JWT"}), b64({"scope": scope, "sub": did, "iat": now, "exp": now + ttl}), "sig"])
+
+
+def _did_from_auth(header: Optional[str]) -> Optional[str]:
+    if not header or not header.startswith("Bearer "):
+        return None
+    try:
+        payload = header[7:].split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload))["sub"]
+    except Exception:
+        return None
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, zoals de echte server
+    state: FakeState  # gezet door make_server
+
+    def log_message(self, format: str, *args: Any) -> None:  # geen access log op stderr
+        pass
+
+    # ---- plumbing ----
+    def do_GET(self) -> None:
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:
+        self._dispatch("POST")
+
+    def _dispatch(self, method: str) -> None:
+        parsed = urlparse(self.path)
+        nsid = parsed.path.rsplit("/", 1)[-1]
+        params = {k: v if len(v) > 1 or k in ("uris", "actors") else v[0] for k, v in parse_qs(parsed.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        body = json.loads(raw) if raw else {}
+        did = _did_from_auth(self.headers.get("Authorization"))
+
+        state = self.state
+        with state.lock:
+            state.requests[nsid] += 1
+            state.bytes_in += len(raw)
+
+        config = state.config
+        if config.latency_ms or config.latency_jitter_ms:
+            time.sleep((config.latency_ms + random.uniform(0, config.latency_jitter_ms)) / 1000)
+
+        limits = state.take(did or self.client_address[0])
+        if limits and limits.pop("exceeded", None):
+            self._send(429, {"error": "RateLimitExceeded", "message": "Rate Limit Exceeded"}, limits)
+            return
+
+        route = ROUTES.get((method, nsid))
+        if route is None:
+            self._send(501, {"error": "MethodNotImplemented", "message": nsid}, limits)
+            return
+        try:
+            status, payload = route(state, did, params, body)
+        except Exception as e:
+            status, payload = 400, {"error": "InvalidRequest", "message": str(e)}
+        self._send(status, payload, limits)
+
+    def _send(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+        with self.state.lock:
+            self.state.bytes_out += len(data)
+
+
+# --------------------------------------------------
+# XRPC endpoints: (state, did, params, body) -> (status, json)
+# --------------------------------------------------
+def _paginate(total: int, params: Dict[str, Any], default_limit: int = 50) -> Tuple[int, int, Optional[str]]:
+    limit = max(1, min(100, int(params.get("limit") or default_limit)))
+    start = int(params.get("cursor") or 0)
+    end = min(total, start + limit)
+    return start, end, str(end) if end < total else None
+
+
+def _with_viewer(state: FakeState, did: Optional[str], item: Dict[str, Any]) -> Dict[str, Any]:
+    item["post"]["viewer"] = state.viewer(did, item["post"]["uri"])
+    return item
+
+
+def create_session(state: FakeState, did: Optional[str], params: Dict[str, Any], body: Dict[str, Any]):
+    ident = body.get("identifier") or "bot.fake.test"
+    did = _did_for(ident)
+    return 200, {
+        "did": did,
+        "handle": _handle_for(ident),
+        "accessJwt": _jwt(did, "com.atproto.access", 2 * 3600),
+        "refreshJwt": _jwt(did, "com.atproto.refresh", 60 * 24 * 3600),
+        "active": True,
+    }
+
+
+def refresh_session(state: FakeState, did: Optional[str], params: Dict[str, Any], body: Dict[str, Any]):
+    did = did or "did:plc:unknown"
+    return 200, {
+        "did": did,
+        "handle": _handle_for(did),
+        "accessJwt": _jwt(did, "com.atproto.access", 2 * 3600),
+        "refreshJwt": _jwt(did, "com.atproto.refresh", 60 * 24 * 3600),
+        "active": True,
+    }
+
+
+def get_profile(state: FakeState, did: Optional[str], params: Dict[str, Any], body: Dict[str, Any]):
+    return 200, _profile(params["actor"])
+
+
+def get_profiles(state: FakeState, did: Optional[str], params: Dict[str, Any], body: Dict[str, Any]):
+    actors = params.get("actors") or []
+    profiles = [_profile(a) for a in actors]
+    with state.lock:
+        # zodat een author feed op DID dezelfde posts (en handle) geeft als op handle
+        state.handles.update((p["did"], p["handle"]) for p in profiles)
+    return 200, {"profiles": profiles}
+
+
+def get_author_feed(state: FakeState, did: Optional[str], params: Dict[str, Any], body: Dict[str, Any]):
+    actor = state.handles.get(params["actor"], params["actor"])
+    start, end, cursor = _paginate(state.config.posts_per_author, params)
+    feed = [_with_viewer(state, did, make_feed_item(state.config, actor, i)) for i in range(start, end)]
+    return 200, {"feed": feed, "cursor": cursor}
+
+
+def get_feed(state: FakeState, did: Optional[str], params: Dict[str, Any], body: Dict[str, Any]):
+    feed_uri = params["feed"]
+    start, end, cursor = _paginate(state.config.feed_size, params)
+    feed = []
+    for i in range(start, end):
+        rng = _seeded(state.config, "feed", feed_uri, str(i))
+        author = f"feedauthor{rng.randint(0, 99)}.fake.test"
+        feed.append(_with_viewer(state, did, {"post": make_post(state.config, author, i)}))
+    return 200, {"feed": feed, "cursor": cursor}
+
+
+def get_list(state: FakeState, did: Optional[str], params: Dict[str, Any], body: Dict[str, Any]):
+    list_uri = params["list"]
+    start, end, cursor = _paginate(state.config.list_members, params)
+    owner = list_uri.split("/")[2] if list_uri.startswith("at://") else "did:plc:owner"
+    items = [
+        {"uri": f"{list_uri}item{i}", "subject": _profile(list_member_handle(i))}
+        for i in range(start, end)
+    ]
+    return 200, {
+        "list": {
+            "uri": list_uri,
+            "cid": "bafylist",
+            "name": "fake list",
+            "purpose": "app.bsky.graph.defs#curatelist",
+            "creator": _profile(owner),
+            "indexedAt": _ts(0),
+        },
+        "items": items,
+        "cursor": cursor,
+    }
+
+
+def get_posts(state: FakeState, did: Optional[str], params: Dict[str, Any], body: Dict[str, Any]):
+    posts = []
+    for uri in params.get("uris", []):
+        # at://<did>/app.bsky.feed.post/<nummer>: terug naar (actor, i) gaat niet voor
+        # did-auteurs, dus een minimale post met de juiste uri + viewer-state
+        repo, _, rkey = uri[5:].split("/", 2)
+        posts.append({
+            "uri": uri,
+            "cid": "bafy" + hashlib.sha256(uri.encode()).hexdigest()[:32],
+            "author": _profile(repo),
+            "record": {"$type": "app.bsky.feed.post", "text": rkey, "createdAt": _ts(0)},
+            "indexedAt": _ts(0),
+            "viewer": state.viewer(did, uri),
+        })
+    return 200, {"posts": posts}
+
+
+def _require_did(did: Optional[str]) -> str:
+    if not did:
+        raise ValueError("authentication required")
+    return did
+
+
+def create_record(state: FakeState, did: Optional[str], params: Dict[str, Any], body: Dict[str, Any]):
+    did = _require_did(did)
+    subject = body["record"]["subject"]["uri"]
+    return 200, state.create(did, body["collection"], subject)
+
+
+def delete_record(state: FakeState, did: Optional[str], params: Dict[str, Any], body: Dict[str, Any]):
+    state.delete(_require_did(did), body["rkey"])
+    return 200, {}
+
+
+def apply_writes(state: FakeState, did: Optional[str], params: Dict[str, Any], body: Dict[str, Any]):
+    did = _require_did(did)
+    results = []
+    for op in body.get("writes", []):
+        kind = op.get("$type", "").rsplit("#", 1)[-1]
+        if kind == "create":
+            created = state.create(did, op["collection"], op["value"]["subject"]["uri"])
+            results.append({"$type": "com.atproto.repo.applyWrites#createResult", **created})
+        elif kind == "delete":
+            state.delete(did, op["rkey"])
+            results.append({"$type": "com.atproto.repo.applyWrites#deleteResult"})
+        else:
+            raise ValueError(f"unsupported write {kind}")
+    return 200, {"results": results}
+
+
+ROUTES = {
+    ("POST", "com.atproto.server.createSession"): create_session,
+    ("POST", "com.atproto.server.refreshSession"): refresh_session,
+    ("GET", "app.bsky.actor.getProfile"): get_profile,
+    ("GET", "app.bsky.actor.getProfiles"): get_profiles,
+    ("GET", "app.bsky.feed.getAuthorFeed"): get_author_feed,
+    ("GET", "app.bsky.feed.getFeed"): get_feed,
+    ("GET", "app.bsky.graph.getList"): get_list,
+    ("GET", "app.bsky.feed.getPosts"): get_posts,
+    ("POST", "com.atproto.repo.createRecord"): create_record,
+    ("POST", "com.atproto.repo.deleteRecord"): delete_record,
+    ("POST", "com.atproto.repo.applyWrites"): apply_writes,
+}
+
+
+class FakeServer:
+    """Draait de fake server in een achtergrond-thread; `url` is de base URL voor de clients."""
+
+    def __init__(self, config: Optional[FakeConfig] = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.state = FakeState(config or FakeConfig())
+        handler = type("BoundHandler", (Handler,), {"state": self.state})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeServer":
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "FakeServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def add_config_args(parser: argparse.ArgumentParser) -> None:
+    d = FakeConfig()
+    parser.add_argument("--seed", type=int, default=d.seed)
+    parser.add_argument("--posts-per-author", type=int, default=d.posts_per_author)
+    parser.add_argument("--feed-size", type=int, default=d.feed_size)
+    parser.add_argument("--list-members", type=int, default=d.list_members)
+    parser.add_argument("--media-mix", default=",".join(f"{k}={v}" for k, v in d.media_mix.items()),
+                        help="bv. images=0.5,video=0.2,external=0.1,text=0.2")
+    parser.add_argument("--quote-ratio", type=float, default=d.quote_ratio)
+    parser.add_argument("--repost-ratio", type=float, default=d.repost_ratio)
+    parser.add_argument("--latency-ms", type=float, default=d.latency_ms)
+    parser.add_argument("--latency-jitter-ms", type=float, default=d.latency_jitter_ms)
+    parser.add_argument("--rate-limit-requests", type=int, default=d.rate_limit_requests,
+                        help="max requests per account per venster (0 = geen rate limit)")
+    parser.add_argument("--rate-limit-window", type=float, default=d.rate_limit_window)
+
+
+def config_from_args(args: argparse.Namespace) -> FakeConfig:
+    mix = {}
+    for part in args.media_mix.split(","):
+        kind, _, weight = part.partition("=")
+        mix[kind.strip()] = float(weight)
+    return FakeConfig(
+        seed=args.seed,
+        posts_per_author=args.posts_per_author,
+        feed_size=args.feed_size,
+        list_members=args.list_members,
+        media_mix=mix,
+        quote_ratio=args.quote_ratio,
+        repost_ratio=args.repost_ratio,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        rate_limit_requests=args.rate_limit_requests,
+        rate_limit_window=args.rate_limit_window,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lokale fake Bluesky server (PDS + AppView) voor benchmarks.")
+    parser.add_argument("--port", type=int, default=8765)
+    add_config_args(parser)
+    args = parser.parse_args()
+
+    server = FakeServer(config_from_args(args), port=args.port)
+    print(f"Fake Bluesky op {server.url} (BSKY_BASE_URL={server.url}), Ctrl+C om te stoppen")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(json.dumps(server.state.snapshot(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import sys
+import json
+import time
+import argparse
+from typing import Any, Callable, List, Tuple
+
+from bench.fake_server import FakeConfig, FakeState, get_author_feed, get_list
+from bench.micro_filters import EDGE_EMBEDS, POST_RECORD
+from bsky_bot.candidates import candidate_from_feed_item, candidate_from_feed_json
+from bsky_bot.list_cache import ListMember
+
+# --------------------------------------------------
+# Micro-benchmark: één feed-pagina (standaard 100 items) van JSON bytes naar
+# PostCandidates, via de atproto modellen (huidige pad) en via de ruwe JSON
+# (feed_pages raw_json). Controleert dat beide paden dezelfde kandidaten opleveren.
+# --------------------------------------------------
+
+
+def author_feed_bytes(config: FakeConfig, page: int, actor: str) -> bytes:
+    _, data = get_author_feed(FakeState(config), None, {"actor": actor, "limit": page}, {})
+    return json.dumps(data).encode()
+
+
+def list_bytes(config: FakeConfig, page: int) -> bytes:
+    _, data = get_list(FakeState(config), None, {"list": "at://did:plc:owner/app.bsky.graph.list/bench", "limit": page}, {})
+    return json.dumps(data).encode()
+
+
+def edge_feed_bytes() -> bytes:
+    """Randgevallen (zie micro_filters) als feed, met een pinned-reason en lege viewer."""
+    feed = []
+    for i, embed in enumerate(EDGE_EMBEDS):
+        feed.append({
+            "post": {
+                "uri": f"at://did:plc:edge/app.bsky.feed.post/{i}",
+                "cid": "bafyedge",
+                "author": {"did": "did:plc:edge", "handle": "edge.fake.test"},
+                "record": POST_RECORD,
+                "indexedAt": "2024-01-01T00:00:00.000Z",
+                "embed": embed,
+                "viewer": {},
+            },
+            "reason": {"$type": "app.bsky.feed.defs#reasonPin"} if i % 2 else None,
+        })
+    return json.dumps({"feed": feed}).encode()
+
+
+def per_page(fn: Callable[[], Any], pages: int) -> float:
+    """Gemiddelde tijd per pagina in ms."""
+    t0 = time.perf_counter()
+    for _ in range(pages):
+        fn()
+    return (time.perf_counter() - t0) / pages * 1000
+
+
+def run(page: int, pages: int, seed: int) -> int:
+    from atproto_client import models
+    from pydantic_core import from_json
+
+    config = FakeConfig(seed=seed, posts_per_author=page)
+    mismatches = 0
+    results: List[Tuple[str, float, float]] = []
+
+    # ---- author feed ----
+    feed_raw = author_feed_bytes(config, page, "bench.fake.test")
+
+    def feed_models() -> List[Any]:
+        resp = models.get_or_create(from_json(feed_raw), models.AppBskyFeedGetAuthorFeed.Response, strict=True)
+        return [candidate_from_feed_item(it) for it in resp.feed]
+
+    def feed_json() -> List[Any]:
+        return [candidate_from_feed_json(it) for it in from_json(feed_raw)["feed"]]
+
+    for raw in (feed_raw, edge_feed_bytes()):
+        resp = models.get_or_create(from_json(raw), models.AppBskyFeedGetAuthorFeed.Response, strict=True)
+        via_models = [candidate_from_feed_item(it) for it in resp.feed]
+        via_json = [candidate_from_feed_json(it) for it in from_json(raw)["feed"]]
+        for a, b in zip(via_models, via_json):
+            if a != b:
+                mismatches += 1
+                print(f"VERSCHIL {a.uri}: modellen={a} json={b}")
+    results.append(("getAuthorFeed", per_page(feed_models, pages), per_page(feed_json, pages)))
+
+    # ---- lijst ----
+    list_raw = list_bytes(FakeConfig(seed=seed, list_members=page), page)
+
+    def list_models() -> List[ListMember]:
+        resp = models.get_or_create(from_json(list_raw), models.AppBskyGraphGetList.Response, strict=True)
+        return [ListMember(it.subject.did, it.subject.handle) for it in resp.items]
+
+    def list_json() -> List[ListMember]:
+        return [ListMember(it["subject"]["did"], it["subject"]["handle"]) for it in from_json(list_raw)["items"]]
+
+    if list_models() != list_json():
+        mismatches += 1
+        print("VERSCHIL: lijst members model- vs JSON-pad")
+    results.append(("getList", per_page(list_models, pages), per_page(list_json, pages)))
+
+    parse = per_page(lambda: from_json(feed_raw), pages)
+    extra = ""
+    try:
+        import orjson
+        extra = f", orjson {per_page(lambda: orjson.loads(feed_raw), pages):.3f} ms"
+    except ImportError:
+        pass
+
+    print(f"Pagina van {page} items ({len(feed_raw) / 1024:.0f} KB), gemiddelde over {pages} pagina's")
+    print(f"JSON parsen (pydantic_core, zit in beide paden): {parse:.3f} ms{extra}")
+    header = f"{'endpoint':<16} {'modellen ms':>12} {'raw JSON ms':>12} {'sneller':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, model_ms, json_ms in results:
+        print(f"{name:<16} {model_ms:>12.3f} {json_ms:>12.3f} {model_ms / json_ms:>7.1f}x")
+    print(f"Controle: {mismatches} verschillen")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark: feed pagina via atproto modellen vs ruwe JSON.")
+    parser.add_argument("--page", type=int, default=100, help="items per pagina (default 100)")
+    parser.add_argument("--pages", type=int, default=200, help="aantal keer herhalen")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    sys.exit(1 if run(args.page, args.pages, args.seed) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import sys
+import time
+import argparse
+from dataclasses import replace
+from typing import Any, Callable, Dict, List
+
+from bench.fake_server import FakeConfig, make_feed_item
+from bsky_bot.candidates import candidate_from_feed_item, embed_flags, embed_flags_by_probing
+
+# --------------------------------------------------
+# Micro-benchmark van het classificeren en filteren van feed items.
+# Items komen uit een pool van unieke synthetische posts (zelfde generator als de fake
+# server, plus randgevallen); grote feeds hergebruiken de pool zodat 1M items niet 1M
+# pydantic modellen in het geheugen vraagt. Elke run controleert ook dat de snelle
+# $type-dispatch exact dezelfde flags en filteruitkomsten geeft als het attributen-proberen.
+# --------------------------------------------------
+
+POST_RECORD = {"$type": "app.bsky.feed.post", "text": "", "createdAt": "2024-01-01T00:00:00.000Z"}
+
+# Randgevallen die de generator niet maakt
+EDGE_EMBEDS: List[Dict[str, Any]] = [
+    {"$type": "app.bsky.embed.external#view", "external": {"uri": "https://x", "title": "", "description": ""}},
+    {"$type": "app.bsky.embed.images#view", "images": []},
+    {
+        "$type": "app.bsky.embed.recordWithMedia#view",
+        "record": {"record": {"$type": "app.bsky.embed.record#viewNotFound", "uri": "at://q", "notFound": True}},
+        "media": {"$type": "app.bsky.embed.video#view", "cid": "c", "playlist": "p"},
+    },
+    {
+        "$type": "app.bsky.embed.recordWithMedia#view",
+        "record": {"record": {"$type": "app.bsky.embed.record#viewNotFound", "uri": "at://q", "notFound": True}},
+        "media": {"$type": "app.bsky.embed.external#view", "external": {"uri": "u", "title": "", "description": "", "thumb": "t"}},
+    },
+    {"$type": "app.bsky.embed.somethingNew#view", "images": [{"thumb": "t"}], "playlist": "p"},
+]
+
+
+def build_pool(size: int, seed: int) -> List[Any]:
+    from atproto_client import models
+
+    config = FakeConfig(seed=seed)
+    raw = [make_feed_item(config, f"author{i % 50}.fake.test", i) for i in range(size)]
+    for i, embed in enumerate(EDGE_EMBEDS):
+        raw.append({"post": {
+            "uri": f"at://did:plc:edge/app.bsky.feed.post/{i}",
+            "cid": "bafyedge",
+            "author": {"did": "did:plc:edge", "handle": "edge.fake.test"},
+            "record": POST_RECORD,
+            "indexedAt": "2024-01-01T00:00:00.000Z",
+            "embed": embed,
+        }})
+    return [models.get_or_create(d, models.AppBskyFeedDefs.FeedViewPost, strict=False) for d in raw]
+
+
+def timed(fn: Callable[[], Any]) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def job_filters() -> Dict[str, Callable[[Any], bool]]:
+    import hollands_glorie
+    import hollands_glorie_random
+    import photo_accounts
+
+    return {
+        "hollands_glorie.is_valid_post": hollands_glorie.is_valid_post,
+        "random.valid_for_repost(feed)": lambda c: hollands_glorie_random.valid_for_repost(c, mode="feed"),
+        "random.valid_for_repost(target)": lambda c: hollands_glorie_random.valid_for_repost(
+            c, mode="target", target_handle="author1.fake.test"
+        ),
+        "photo_accounts.is_valid_candidate": photo_accounts.is_valid_candidate,
+    }
+
+
+def verify(pool: List[Any], filters: Dict[str, Callable[[Any], bool]]) -> int:
+    """Aantal verschillen tussen dispatch en proberen (flags én filteruitkomsten)."""
+    mismatches = 0
+    for item in pool:
+        embed = item.post.embed
+        fast = embed_flags(item.post)
+        slow = embed_flags_by_probing(embed) if embed else 0
+        if fast != slow:
+            mismatches += 1
+            print(f"  VERSCHIL flags {item.post.uri}: dispatch={fast:#x} proberen={slow:#x}")
+            continue
+        candidate = candidate_from_feed_item(item)
+        probed = replace(candidate, embed_flags=slow)
+        for name, fn in filters.items():
+            if fn(candidate) != fn(probed):
+                mismatches += 1
+                print(f"  VERSCHIL {name} {item.post.uri}")
+    return mismatches
+
+
+def run(sizes: List[int], pool_size: int, seed: int) -> int:
+    pool = build_pool(pool_size, seed)
+    filters = job_filters()
+
+    mismatches = verify(pool, filters)
+    print(f"Controle: {len(pool)} unieke items, {mismatches} verschillen")
+
+    header = f"{'items':>9}  {'stap':<36} {'s':>7} {'items/s':>12}"
+    print(header)
+    print("-" * len(header))
+    for n in sizes:
+        items = [pool[i % len(pool)] for i in range(n)]
+        posts = [item.post for item in items]
+        embeds = [p.embed for p in posts]
+
+        rows = [
+            ("embed_flags_by_probing", timed(lambda: [embed_flags_by_probing(e) if e else 0 for e in embeds])),
+            ("embed_flags ($type dispatch)", timed(lambda: [embed_flags(p) for p in posts])),
+        ]
+        candidates: List[Any] = []
+        rows.append(("candidate_from_feed_item", timed(lambda: candidates.extend(candidate_from_feed_item(i) for i in items))))
+        for name, fn in filters.items():
+            rows.append((name, timed(lambda: [fn(c) for c in candidates])))
+
+        for name, secs in rows:
+            print(f"{n:>9}  {name:<36} {secs:>7.3f} {n / secs if secs else float('inf'):>12,.0f}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark van embed-classificatie en post filters.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--pool", type=int, default=5000, help="aantal unieke synthetische items")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    mismatches = run(args.sizes, args.pool, args.seed)
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
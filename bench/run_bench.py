@@ -0,0 +1,133 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import resource
+import importlib
+import subprocess
+import tracemalloc
+from typing import Any, Dict, List
+
+from bench.fake_server import FakeServer, add_config_args, config_from_args
+
+# --------------------------------------------------
+# Benchmark: draait elke job (main_async -> process_account per bot-account) tegen de
+# lokale fake server, elk in een eigen proces zodat caches, sessies en geheugen per job
+# schoon beginnen. Run 1 is koud (lege state dir), volgende runs warm (zelfde state dir).
+# --------------------------------------------------
+
+JOBS = ["photo_accounts", "hollands_glorie", "hollands_glorie_random"]
+
+# Zo herkent de parent de resultaatregel tussen de logs van het child proces
+RESULT_PREFIX = "BENCH_RESULT "
+
+
+def run_child(job: str, trace_memory: bool) -> None:
+    """In het child proces: één job draaien en metingen als één JSON regel printen."""
+    from bsky_bot.metrics import METRICS, export_metrics
+    from bsky_bot.transport import STATS
+    from run_bots import run_jobs
+
+    if trace_memory:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    cpu0 = time.process_time()
+    failed = asyncio.run(run_jobs([job]))
+    wall = time.perf_counter() - t0
+    cpu = time.process_time() - cpu0
+    export_metrics()
+
+    result = {
+        "job": job,
+        "failed": failed,
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "client_requests": STATS.requests,
+        "connects": STATS.connects,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "metrics": METRICS.summary(),
+    }
+    if trace_memory:
+        result["py_peak_kb"] = tracemalloc.get_traced_memory()[1] // 1024
+    print(RESULT_PREFIX + json.dumps(result), flush=True)
+
+
+def run_job(job: str, server: FakeServer, state_dir: str, args: argparse.Namespace) -> Dict[str, Any]:
+    labels = importlib.import_module(job).ACCOUNT_KEYS
+    env = dict(os.environ)
+    env.update({
+        "BSKY_BASE_URL": server.url,
+        "BSKY_STATE_DIR": state_dir,
+        **{f"BSKY_USERNAME_{label}": f"{label.lower()}.fake.test" for label in labels},
+        **{f"BSKY_PASSWORD_{label}": "fake" for label in labels},
+        "BSKY_RAW_JSON": "1" if args.raw_json else "0",
+    })
+    cmd = [sys.executable, "-m", "bench.run_bench", "--child", job]
+    if args.trace_memory:
+        cmd.append("--trace-memory")
+
+    server.state.reset_counters()
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    if args.verbose or proc.returncode != 0:
+        sys.stderr.write(proc.stderr)
+
+    lines = [line for line in proc.stdout.splitlines() if line.startswith(RESULT_PREFIX)]
+    if not lines:
+        raise RuntimeError(f"{job}: geen resultaat (exit {proc.returncode})")
+    result = json.loads(lines[-1][len(RESULT_PREFIX):])
+    result["server"] = server.state.snapshot()
+    return result
+
+
+def print_table(results: List[Dict[str, Any]]) -> None:
+    header = f"{'job':<24} {'run':>3} {'wall s':>8} {'cpu s':>6} {'requests':>8} {'429':>4} {'KB in':>8} {'KB out':>8} {'max RSS MB':>10}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        s = r["server"]
+        print(
+            f"{r['job']:<24} {r['run']:>3} {r['wall_s']:>8.2f} {r['cpu_s']:>6.2f} {s['total_requests']:>8} {s['rate_limited']:>4} "
+            f"{s['bytes_in'] / 1024:>8.1f} {s['bytes_out'] / 1024:>8.1f} {r['max_rss_kb'] / 1024:>10.1f}"
+        )
+    for r in results:
+        calls = ", ".join(f"{k.rsplit('.', 1)[-1]}={v}" for k, v in sorted(r["server"]["requests"].items()))
+        print(f"  {r['job']} run {r['run']}: {calls}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark van de bot-jobs tegen een lokale fake Bluesky server.")
+    parser.add_argument("jobs", nargs="*", help=f"jobs (standaard: {' '.join(JOBS)})")
+    parser.add_argument("--runs", type=int, default=2, help="runs per job; run 1 koud, daarna warm (default 2)")
+    parser.add_argument("--trace-memory", action="store_true", help="ook Python heap piek meten (tracemalloc, trager)")
+    parser.add_argument("--json", dest="json_out", help="resultaten ook als JSON naar dit bestand")
+    parser.add_argument("--raw-json", action="store_true", help="jobs met het raw-JSON feed pad (BSKY_RAW_JSON=1)")
+    parser.add_argument("--verbose", action="store_true", help="logs van de jobs tonen")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    add_config_args(parser)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.trace_memory)
+        return
+
+    jobs = args.jobs or JOBS
+    results = []
+    with FakeServer(config_from_args(args)) as server:
+        for job in jobs:
+            with tempfile.TemporaryDirectory(prefix=f"bench-{job}-") as state_dir:
+                for run in range(1, args.runs + 1):
+                    result = run_job(job, server, state_dir, args)
+                    result["run"] = run
+                    results.append(result)
+
+    print_table(results)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
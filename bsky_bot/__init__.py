@@ -0,0 +1,3 @@
+"""
+Gedeelde helpers voor de Hollands Glorie / Photo Accounts bots.
+"""
@@ -0,0 +1,54 @@
+import os
+import logging
+from typing import TYPE_CHECKING, Optional, Tuple
+
+from bsky_bot.metrics import METRICS
+from bsky_bot.ratelimit import RateLimits
+from bsky_bot.startup import timed_import
+from bsky_bot.transport import HttpSettings
+
+if TYPE_CHECKING:
+    from atproto_client import AsyncClient
+
+# Eén login per account per proces (run_bots draait alle jobs samen), dus deze instellingen gelden
+# voor alle jobs; daarom staan ze hier en niet per script.
+# Token buckets per account i.p.v. vaste 1s sleep: korte bursts mogen, daarna max ~2 writes/s en ~10 reads/s.
+# ratelimit-remaining/reset headers van de server gaan altijd voor.
+RATE_LIMITS = RateLimits(writes_per_second=2.0, write_burst=10, reads_per_second=10.0, read_burst=30)
+# Gedeelde HTTP connection pool (keep-alive) voor alle accounts; http2=True vereist 'h2'
+HTTP_SETTINGS = HttpSettings(max_connections=20, max_keepalive=10, connect_timeout=5.0, read_timeout=30.0)
+
+
+def _credentials(label: str) -> Tuple[Optional[str], Optional[str]]:
+    return os.getenv(f"BSKY_USERNAME_{label}"), os.getenv(f"BSKY_PASSWORD_{label}")
+
+
+def has_credentials(label: str) -> bool:
+    username, password = _credentials(label)
+    return bool(username and password)
+
+
+async def get_client_for_account(label: str) -> Optional["AsyncClient"]:
+    """
+    Ingelogde client voor bot-account `label` (credentials uit BSKY_USERNAME_<label> /
+    BSKY_PASSWORD_<label>). None als er geen credentials zijn of de login mislukt.
+    Eén login per account per proces, ook als meerdere jobs hetzelfde account gebruiken;
+    rate limits en HTTP instellingen zijn RATE_LIMITS / HTTP_SETTINGS.
+    atproto wordt pas hier geladen, bij de eerste client die echt nodig is.
+    """
+    username, password = _credentials(label)
+
+    if not username or not password:
+        logging.warning("Geen credentials voor %s, skip.", label)
+        return None
+
+    try:
+        # hergebruikt opgeslagen sessie / al ingelogde client i.p.v. elke run createSession
+        sessions = timed_import("bsky_bot.sessions")
+        with METRICS.phase("login", label):
+            client = await sessions.login_with_session_cache(label, username, password, RATE_LIMITS, HTTP_SETTINGS)
+        logging.info("Ingelogd (label=%s)", label)
+        return client
+    except Exception as e:
+        logging.error("Login mislukt voor %s: %s", label, e)
+        return None
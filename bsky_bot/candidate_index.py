@@ -0,0 +1,199 @@
+import time
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from bsky_bot.candidates import PostCandidate
+from bsky_bot.state import state_path
+
+INDEX_FILE = "candidates.sqlite3"
+SCHEMA_VERSION = 3  # ophogen bij schema-wijziging; oude index wordt dan weggegooid (is maar een cache)
+
+# Fetch-statistiek per actor: oude runs tellen per run met deze factor minder mee
+STATS_DECAY = 0.7
+
+# Eviction
+MAX_ROWS_PER_ACTOR = 200        # nieuwste N items per actor bewaren
+ACTOR_IDLE_DAYS = 14            # actor niet meer opgevraagd (bv. uit lijst) -> helemaal weg (LRU)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS actors (
+    namespace   TEXT NOT NULL,
+    actor       TEXT NOT NULL,
+    hwm         TEXT,
+    full_at     REAL NOT NULL DEFAULT 0,
+    last_access REAL NOT NULL DEFAULT 0,
+    -- opgehaalde items / waarvan geldig / response bytes, gewogen (STATS_DECAY per run)
+    items_seen  REAL NOT NULL DEFAULT 0,
+    valid_seen  REAL NOT NULL DEFAULT 0,
+    bytes_seen  REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (namespace, actor)
+);
+CREATE TABLE IF NOT EXISTS posts (
+    namespace     TEXT NOT NULL,
+    actor         TEXT NOT NULL,
+    uri           TEXT NOT NULL,
+    cid           TEXT NOT NULL,
+    author_handle TEXT NOT NULL,
+    created_at    TEXT NOT NULL,
+    sort_ts       TEXT NOT NULL,
+    is_repost     INTEGER NOT NULL,
+    embed_flags   INTEGER NOT NULL,
+    valid         INTEGER NOT NULL,
+    PRIMARY KEY (namespace, actor, uri)
+);
+CREATE INDEX IF NOT EXISTS posts_last_valid ON posts (namespace, actor, valid, sort_ts DESC);
+"""
+
+_COLUMNS = "uri, cid, author_handle, created_at, sort_ts, is_repost, embed_flags"
+
+
+@dataclass(frozen=True)
+class FetchStats:
+    """Wat eerdere fetches van een actor opleverden (gewogen, recente runs tellen zwaarder)."""
+    items: float
+    valid: float
+    bytes: float
+
+    @property
+    def valid_ratio(self) -> float:
+        return self.valid / self.items if self.items else 0.0
+
+    @property
+    def bytes_per_item(self) -> float:
+        return self.bytes / self.items if self.items else 0.0
+
+
+class CandidateIndex:
+    """
+    Compacte index (SQLite) van alles wat we uit author feeds gezien hebben, per script-namespace
+    en actor. Per post alleen de velden uit PostCandidate (media/quote zitten in embed_flags)
+    + of het script 'm geldig vond.
+    Kiezen gaat daarna via last_valid() i.p.v. opnieuw filteren over ruwe feeds.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self._conn = sqlite3.connect(path or state_path(INDEX_FILE), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                self._conn.executescript("DROP TABLE IF EXISTS posts; DROP TABLE IF EXISTS actors;")
+                self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self._conn.executescript(_SCHEMA)
+
+    def actor_state(self, namespace: str, actor: str) -> Tuple[Optional[str], float]:
+        """(high-water-mark, tijdstip laatste volledige fetch) of (None, 0) als onbekend."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT hwm, full_at FROM actors WHERE namespace = ? AND actor = ?",
+                (namespace, actor),
+            ).fetchone()
+        return (row[0], row[1]) if row else (None, 0.0)
+
+    def ingest(
+        self,
+        namespace: str,
+        actor: str,
+        rows: List[Tuple[PostCandidate, bool]],
+        hwm: Optional[str],
+        replace: bool,
+    ) -> None:
+        """
+        rows: (kandidaat, geldig volgens het script), nieuwste eerst.
+        replace=True -> alles van deze actor eerst weg (volledige fetch).
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            if replace:
+                self._conn.execute("DELETE FROM posts WHERE namespace = ? AND actor = ?", (namespace, actor))
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO posts (namespace, actor, {_COLUMNS}, valid) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (namespace, actor, c.uri, c.cid, c.author_handle, c.created_at,
+                     c.sort_ts, int(c.is_repost), c.embed_flags, int(valid))
+                    for c, valid in rows
+                ],
+            )
+            self._conn.execute(
+                "INSERT INTO actors (namespace, actor, hwm, full_at, last_access) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (namespace, actor) DO UPDATE SET "
+                "hwm = excluded.hwm, last_access = excluded.last_access, "
+                "full_at = CASE WHEN ? THEN excluded.full_at ELSE actors.full_at END",
+                (namespace, actor, hwm, now if replace else 0.0, now, int(replace)),
+            )
+            # per actor alleen de nieuwste MAX_ROWS_PER_ACTOR houden
+            self._conn.execute(
+                "DELETE FROM posts WHERE namespace = ? AND actor = ? AND uri NOT IN ("
+                " SELECT uri FROM posts WHERE namespace = ? AND actor = ? ORDER BY sort_ts DESC LIMIT ?)",
+                (namespace, actor, namespace, actor, MAX_ROWS_PER_ACTOR),
+            )
+
+    def fetch_stats(self, namespace: str, actor: str) -> Optional[FetchStats]:
+        """None als er nog nooit iets van deze actor opgehaald is."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT items_seen, valid_seen, bytes_seen FROM actors WHERE namespace = ? AND actor = ?",
+                (namespace, actor),
+            ).fetchone()
+        return FetchStats(*row) if row and row[0] > 0 else None
+
+    def record_fetch(self, namespace: str, actor: str, items: int, valid: int, n_bytes: int) -> None:
+        """Resultaat van één fetch bijtellen (na ingest, dus de actor bestaat al)."""
+        if not items:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE actors SET items_seen = items_seen * ? + ?, valid_seen = valid_seen * ? + ?, "
+                "bytes_seen = bytes_seen * ? + ? WHERE namespace = ? AND actor = ?",
+                (STATS_DECAY, items, STATS_DECAY, valid, STATS_DECAY, n_bytes, namespace, actor),
+            )
+
+    def last_valid(self, namespace: str, actor: str, n: int) -> List[PostCandidate]:
+        """De laatste n geldige posts van actor (nieuwste eerst), zonder viewer-state."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE actors SET last_access = ? WHERE namespace = ? AND actor = ?",
+                (time.time(), namespace, actor),
+            )
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM posts WHERE namespace = ? AND actor = ? AND valid = 1 "
+                "ORDER BY sort_ts DESC LIMIT ?",
+                (namespace, actor, n),
+            ).fetchall()
+        return [
+            PostCandidate(
+                uri=r[0], cid=r[1], author_handle=r[2], created_at=r[3],
+                sort_ts=r[4], is_repost=bool(r[5]), embed_flags=r[6],
+            )
+            for r in rows
+        ]
+
+    def evict(self) -> int:
+        """LRU: actors die ACTOR_IDLE_DAYS niet opgevraagd zijn eruit. Geeft aantal verwijderde actors."""
+        cutoff = time.time() - ACTOR_IDLE_DAYS * 86400
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM posts WHERE (namespace, actor) IN ("
+                " SELECT namespace, actor FROM actors WHERE last_access < ?)",
+                (cutoff,),
+            )
+            return self._conn.execute("DELETE FROM actors WHERE last_access < ?", (cutoff,)).rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_INDEX: Optional[CandidateIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_index() -> CandidateIndex:
+    global _INDEX
+    with _INDEX_LOCK:
+        if _INDEX is None:
+            _INDEX = CandidateIndex()
+            _INDEX.evict()
+        return _INDEX
@@ -0,0 +1,263 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+# --------------------------------------------------
+# Embed vlaggen (bitmask in PostCandidate.embed_flags)
+# Dit zijn de "ruwe" feiten over de embed; elk script beslist zelf wat voor hem
+# media / quote is (die regels verschillen per script), via de mask die het aan
+# has_media() / is_quote_post() meegeeft.
+# --------------------------------------------------
+IMAGES = 1 << 0           # embed.images
+MEDIA_IMAGES = 1 << 1     # embed.media.images (recordWithMedia)
+EXTERNAL_THUMB = 1 << 2   # embed.external.thumb (link preview met plaatje)
+VIDEO = 1 << 3            # embed.playlist / cid / video / aspect_ratio
+MEDIA_VIDEO = 1 << 4      # embed.media.playlist / video / aspect_ratio
+RECORD = 1 << 5           # embed.record (quote)
+MEDIA_RECORD = 1 << 6     # embed.media.record
+
+_VIDEO_ATTRS = ("playlist", "video", "aspect_ratio", "aspectRatio")
+
+
+@dataclass(slots=True)
+class PostCandidate:
+    """
+    Compacte weergave van een feed item: alleen wat we nodig hebben om te filteren, kiezen
+    en te reposten. Wordt direct bij binnenkomst gemaakt; het atproto model kan daarna weg.
+    """
+    uri: str
+    cid: str
+    author_handle: str
+    created_at: str
+    sort_ts: str             # plek in de feed (repost-tijd voor reposts, anders indexedAt)
+    is_repost: bool          # feed item had een reason (repost in de feed)
+    embed_flags: int         # zie IMAGES, VIDEO, RECORD, ...
+    # (repost_uri, like_uri) van het account dat ophaalde; None = onbekend
+    viewer: Optional[Tuple[Optional[str], Optional[str]]] = None
+
+    @property
+    def media_kind(self) -> str:
+        """'images' / 'video' / 'external' / '' (geen media)."""
+        if self.embed_flags & (IMAGES | MEDIA_IMAGES):
+            return "images"
+        if self.embed_flags & (VIDEO | MEDIA_VIDEO):
+            return "video"
+        if self.embed_flags & EXTERNAL_THUMB:
+            return "external"
+        return ""
+
+
+def has_media(post: PostCandidate, mask: int) -> bool:
+    """True als de post één van de embed-soorten in mask heeft (bv. IMAGES | VIDEO)."""
+    return bool(post.embed_flags & mask)
+
+
+def is_quote_post(post: PostCandidate, mask: int = RECORD) -> bool:
+    """Quote posts hebben een embed.record (met mask=RECORD | MEDIA_RECORD ook onder embed.media)."""
+    return bool(post.embed_flags & mask)
+
+
+def embed_flags_by_probing(embed) -> int:
+    """
+    Flags door alle bekende attributen af te lopen; voor embeds waarvan het type
+    niet in _EMBED_FLAGS staat (nieuwe lexicon types, losse dicts).
+    """
+    flags = 0
+    images = getattr(embed, "images", None)
+    if isinstance(images, list) and images:
+        flags |= IMAGES
+    if getattr(embed, "cid", None) or any(getattr(embed, a, None) for a in _VIDEO_ATTRS):
+        flags |= VIDEO
+    external = getattr(embed, "external", None)
+    if external and getattr(external, "thumb", None):
+        flags |= EXTERNAL_THUMB
+    if getattr(embed, "record", None) is not None:
+        flags |= RECORD
+
+    media = getattr(embed, "media", None)
+    if media:
+        flags |= _media_flags_by_probing(media)
+
+    return flags
+
+
+def _media_flags_by_probing(media) -> int:
+    flags = 0
+    media_images = getattr(media, "images", None)
+    if isinstance(media_images, list) and media_images:
+        flags |= MEDIA_IMAGES
+    if any(getattr(media, a, None) for a in _VIDEO_ATTRS):
+        flags |= MEDIA_VIDEO
+    if getattr(media, "record", None):
+        flags |= MEDIA_RECORD
+    return flags
+
+
+# Per embed view type ($type / py_type) direct de juiste velden, i.p.v. alles proberen.
+# Moet exact dezelfde flags geven als embed_flags_by_probing (zie bench/micro_filters.py).
+def _images_view(embed) -> int:
+    return IMAGES if embed.images else 0
+
+
+def _video_view(embed) -> int:
+    return VIDEO if embed.cid or embed.playlist or embed.aspect_ratio else 0
+
+
+def _external_view(embed) -> int:
+    return EXTERNAL_THUMB if embed.external and embed.external.thumb else 0
+
+
+def _record_view(embed) -> int:
+    return RECORD if embed.record is not None else 0
+
+
+def _record_with_media_view(embed) -> int:
+    flags = _record_view(embed)
+    media = embed.media
+    if media:
+        handler = _MEDIA_FLAGS.get(getattr(media, "py_type", None))
+        flags |= handler(media) if handler else _media_flags_by_probing(media)
+    return flags
+
+
+_EMBED_FLAGS = {
+    "app.bsky.embed.images#view": _images_view,
+    "app.bsky.embed.video#view": _video_view,
+    "app.bsky.embed.external#view": _external_view,
+    "app.bsky.embed.record#view": _record_view,
+    "app.bsky.embed.recordWithMedia#view": _record_with_media_view,
+}
+
+_MEDIA_FLAGS = {
+    "app.bsky.embed.images#view": lambda media: MEDIA_IMAGES if media.images else 0,
+    "app.bsky.embed.video#view": lambda media: MEDIA_VIDEO if media.playlist or media.aspect_ratio else 0,
+    "app.bsky.embed.external#view": lambda media: 0,
+}
+
+
+def embed_flags(post_view) -> int:
+    embed = getattr(post_view, "embed", None)
+    if not embed:
+        return 0
+
+    handler = _EMBED_FLAGS.get(getattr(embed, "py_type", None))
+    if handler is None:
+        return embed_flags_by_probing(embed)
+    return handler(embed)
+
+
+# --------------------------------------------------
+# Zelfde classificatie op ruwe XRPC JSON (dicts met camelCase keys), voor het
+# raw-JSON pad zonder atproto modellen. Moet exact dezelfde flags geven als embed_flags
+# op het model van dezelfde JSON (zie bench/micro_feeds.py).
+# --------------------------------------------------
+_VIDEO_KEYS = ("playlist", "video", "aspectRatio", "aspect_ratio")
+
+
+def _probe_json(embed: dict) -> int:
+    flags = 0
+    images = embed.get("images")
+    if isinstance(images, list) and images:
+        flags |= IMAGES
+    if embed.get("cid") or any(embed.get(k) for k in _VIDEO_KEYS):
+        flags |= VIDEO
+    external = embed.get("external")
+    if external and external.get("thumb"):
+        flags |= EXTERNAL_THUMB
+    if embed.get("record") is not None:
+        flags |= RECORD
+    media = embed.get("media")
+    if media:
+        flags |= _probe_media_json(media)
+    return flags
+
+
+def _probe_media_json(media: dict) -> int:
+    flags = 0
+    images = media.get("images")
+    if isinstance(images, list) and images:
+        flags |= MEDIA_IMAGES
+    if any(media.get(k) for k in _VIDEO_KEYS):
+        flags |= MEDIA_VIDEO
+    if media.get("record"):
+        flags |= MEDIA_RECORD
+    return flags
+
+
+def _record_with_media_json(embed: dict) -> int:
+    flags = RECORD if embed.get("record") is not None else 0
+    media = embed.get("media")
+    if media:
+        handler = _MEDIA_FLAGS_JSON.get(media.get("$type"))
+        flags |= handler(media) if handler else _probe_media_json(media)
+    return flags
+
+
+_EMBED_FLAGS_JSON = {
+    "app.bsky.embed.images#view": lambda e: IMAGES if e.get("images") else 0,
+    "app.bsky.embed.video#view": lambda e: VIDEO if e.get("cid") or e.get("playlist") or e.get("aspectRatio") else 0,
+    "app.bsky.embed.external#view": lambda e: EXTERNAL_THUMB if (e.get("external") or {}).get("thumb") else 0,
+    "app.bsky.embed.record#view": lambda e: RECORD if e.get("record") is not None else 0,
+    "app.bsky.embed.recordWithMedia#view": _record_with_media_json,
+}
+
+_MEDIA_FLAGS_JSON = {
+    "app.bsky.embed.images#view": lambda m: MEDIA_IMAGES if m.get("images") else 0,
+    "app.bsky.embed.video#view": lambda m: MEDIA_VIDEO if m.get("playlist") or m.get("aspectRatio") else 0,
+    "app.bsky.embed.external#view": lambda m: 0,
+}
+
+
+def embed_flags_json(post: dict) -> int:
+    embed = post.get("embed")
+    if not embed:
+        return 0
+    handler = _EMBED_FLAGS_JSON.get(embed.get("$type"))
+    return handler(embed) if handler else _probe_json(embed)
+
+
+def feed_sort_ts(feed_item) -> str:
+    """
+    Tijdstip waarop het item in de feed staat (repost-tijd voor reposts, anders indexedAt).
+    ISO strings uit de AppView, dus string-vergelijking volstaat.
+    """
+    reason = getattr(feed_item, "reason", None)
+    ts = getattr(reason, "indexed_at", None) if reason else None
+    return ts or feed_item.post.indexed_at or ""
+
+
+def candidate_from_feed_item(feed_item) -> PostCandidate:
+    post = feed_item.post
+    author = getattr(post, "author", None)
+    record = getattr(post, "record", None)
+    viewer = getattr(post, "viewer", None)
+
+    return PostCandidate(
+        uri=post.uri,
+        cid=post.cid,
+        author_handle=(getattr(author, "handle", None) or "") if author else "",
+        created_at=getattr(record, "created_at", None) or "",
+        sort_ts=feed_sort_ts(feed_item),
+        is_repost=getattr(feed_item, "reason", None) is not None,
+        embed_flags=embed_flags(post),
+        viewer=(getattr(viewer, "repost", None), getattr(viewer, "like", None)) if viewer else None,
+    )
+
+
+def candidate_from_feed_json(feed_item: dict) -> PostCandidate:
+    """candidate_from_feed_item, maar direct op het JSON item (geen atproto model nodig)."""
+    post = feed_item["post"]
+    author = post.get("author")
+    record = post.get("record")
+    reason = feed_item.get("reason")
+    viewer = post.get("viewer")
+
+    return PostCandidate(
+        uri=post["uri"],
+        cid=post["cid"],
+        author_handle=(author.get("handle") or "") if author else "",
+        created_at=(record.get("createdAt") if isinstance(record, dict) else None) or "",
+        sort_ts=(reason.get("indexedAt") if reason else None) or post.get("indexedAt") or "",
+        is_repost=reason is not None,
+        embed_flags=embed_flags_json(post),
+        viewer=(viewer.get("repost"), viewer.get("like")) if viewer is not None else None,
+    )
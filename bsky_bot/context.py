@@ -0,0 +1,20 @@
+import logging
+import contextvars
+
+# Account waar de huidige taak voor draait; komt als %(account)s in elke logregel
+# en bepaalt bij welk account metrics en events geteld worden
+CURRENT_ACCOUNT: contextvars.ContextVar[str] = contextvars.ContextVar("account", default="main")
+
+_default_record_factory = logging.getLogRecordFactory()
+
+
+def _record_factory(*args, **kwargs) -> logging.LogRecord:
+    record = _default_record_factory(*args, **kwargs)
+    record.account = CURRENT_ACCOUNT.get()
+    return record
+
+
+def install_record_factory() -> None:
+    """Zet record.account op elk log record (via setup_logging); vaker aanroepen kan geen kwaad."""
+    if logging.getLogRecordFactory() is not _record_factory:
+        logging.setLogRecordFactory(_record_factory)
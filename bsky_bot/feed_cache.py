@@ -0,0 +1,210 @@
+import time
+import asyncio
+import logging
+import weakref
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, MutableMapping, Optional, Set, Tuple, Union
+
+from bsky_bot.candidates import PostCandidate
+from bsky_bot.state import load_json, save_json
+
+if TYPE_CHECKING:
+    from atproto_client import AsyncClient
+
+# app.bsky.feed.getPosts accepteert max 25 URIs per call
+GET_POSTS_BATCH = 25
+# Zo lang (seconden) wachten op viewer-state vragen van andere taken voor dezelfde getPosts call
+VIEWER_BATCH_WINDOW = 0.02
+
+ViewerState = Tuple[Optional[str], Optional[str]]
+
+
+@dataclass
+class CachedFeed:
+    items: List[PostCandidate]    # gefilterde kandidaten
+    fetched_at: float
+    viewer_label: Optional[str]   # account waarvan de viewer-velden in items kloppen (None = niemand)
+    # (label, uri) waarvoor de viewer-velden al gebruikt zijn; daarna zijn ze verouderd
+    # (we hebben er zelf net op gerepost/geliked)
+    viewer_used: Set[Tuple[str, str]] = field(default_factory=set)
+
+
+class FeedCache:
+    """
+    Run-brede cache van kandidaten per author/feed URI, gedeeld door alle bot-accounts.
+    De feed wordt één keer opgehaald (door het eerste account dat erom vraagt);
+    de andere accounts lezen alleen hun eigen viewer-state (repost/like) bij via viewer_state_for().
+
+    ttl_seconds > 0 -> ook op schijf bewaren en in volgende runs hergebruiken zolang niet ouder dan TTL.
+    """
+
+    def __init__(self, name: str, ttl_seconds: int = 0) -> None:
+        # name: per script een eigen bestand, want elk script filtert kandidaten anders
+        self.cache_file = f"feed_cache/{name}.json"
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, CachedFeed] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        if ttl_seconds > 0:
+            self._load()
+
+    def _lock_for(self, key: str) -> asyncio.Lock:
+        return self._locks.setdefault(key, asyncio.Lock())
+
+    def _fresh(self, entry: CachedFeed) -> bool:
+        if self.ttl_seconds <= 0:
+            return True  # alleen in-memory, dus per definitie deze run
+        return time.time() - entry.fetched_at < self.ttl_seconds
+
+    async def get(self, key: str, label: str, fetch: Callable[[], Awaitable[List[PostCandidate]]]) -> CachedFeed:
+        """
+        Geeft de kandidaten voor key terug; wacht fetch() alleen af als er nog niks (geldigs) is.
+        Per key maar één fetch tegelijk: parallelle accounts wachten op elkaar i.p.v. dubbel te lezen.
+        Exceptions uit fetch() gaan gewoon door naar de caller (en worden niet gecachet).
+        """
+        async with self._lock_for(key):
+            entry = self._entries.get(key)
+            if entry is not None and self._fresh(entry):
+                self.hits += 1
+                return entry
+
+            self.misses += 1
+            entry = CachedFeed(items=await fetch(), fetched_at=time.time(), viewer_label=label)
+            self._entries[key] = entry
+            return entry
+
+    def _load(self) -> None:
+        data = load_json(self.cache_file, default={}) or {}
+        for key, raw in data.items():
+            try:
+                items = [PostCandidate(**it) for it in raw["items"]]
+            except Exception as e:
+                logging.warning("Feed cache entry %s onleesbaar, negeer: %s", key, e)
+                continue
+            entry = CachedFeed(items=items, fetched_at=raw["fetched_at"], viewer_label=None)
+            if self._fresh(entry):
+                self._entries[key] = entry
+
+    def save(self) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        data = {}
+        for key, entry in self._entries.items():
+            if not self._fresh(entry):
+                continue
+            data[key] = {
+                "fetched_at": entry.fetched_at,
+                # viewer hoort bij het ophalende account en is volgende run verouderd
+                "items": [dict(asdict(it), viewer=None) for it in entry.items],
+            }
+        try:
+            save_json(self.cache_file, data)
+        except Exception as e:
+            logging.warning("Feed cache opslaan mislukt: %s", e)
+
+
+async def viewer_states(client: "AsyncClient", uris: List[str]) -> Dict[str, ViewerState]:
+    """(repost_uri, like_uri) van *dit* account voor max GET_POSTS_BATCH posts in één getPosts call."""
+    resp = await client.get_posts(uris)
+    states: Dict[str, ViewerState] = {uri: (None, None) for uri in uris}
+    for p in resp.posts or []:
+        viewer = getattr(p, "viewer", None)
+        if viewer:
+            states[p.uri] = (getattr(viewer, "repost", None), getattr(viewer, "like", None))
+    return states
+
+
+class ViewerStateLoader:
+    """
+    Bundelt viewer-state vragen van gelijktijdige taken van één account (bronnen, prefetch)
+    tot één getPosts call per max GET_POSTS_BATCH URIs, i.p.v. één call per post.
+    Een vraag wacht hooguit VIEWER_BATCH_WINDOW op andere vragen.
+    """
+
+    def __init__(self, client: "AsyncClient") -> None:
+        self.client = client
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # lopende getPosts taken: asyncio houdt zelf alleen een zwakke referentie, en een
+        # weggegooide taak laat al z'n wachtende vragen eeuwig hangen
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def get(self, uri: str) -> ViewerState:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.setdefault(uri, []).append(fut)
+        if len(self._pending) >= GET_POSTS_BATCH:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(VIEWER_BATCH_WINDOW, self._flush)
+        return await fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            uris = list(self._pending)[:GET_POSTS_BATCH]
+            waiters = {uri: self._pending.pop(uri) for uri in uris}
+            task = asyncio.ensure_future(self._load(waiters))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _load(self, waiters: Dict[str, List[asyncio.Future]]) -> None:
+        try:
+            states = await viewer_states(self.client, list(waiters))
+        except Exception as e:
+            for futs in waiters.values():
+                for fut in futs:
+                    if not fut.done():
+                        fut.set_exception(e)
+            return
+        for uri, futs in waiters.items():
+            for fut in futs:
+                if not fut.done():
+                    fut.set_result(states[uri])
+
+
+# Eén loader per ingelogde client (= per account), weg zodra de client weg is
+_LOADERS: MutableMapping["AsyncClient", ViewerStateLoader] = weakref.WeakKeyDictionary()
+
+
+async def viewer_state(client: "AsyncClient", candidate: PostCandidate) -> ViewerState:
+    """
+    Haal (repost_uri, like_uri) van *dit* account op voor één post.
+    Nodig als de post uit een feed komt die door een ander account is opgehaald.
+    Gelijktijdige vragen van hetzelfde account gaan samen in één getPosts call.
+    """
+    loader = _LOADERS.get(client)
+    if loader is None:
+        loader = _LOADERS[client] = ViewerStateLoader(client)
+    return await loader.get(candidate.uri)
+
+
+async def viewer_state_for(
+    client: "AsyncClient", label: str, entry: CachedFeed, candidate: PostCandidate
+) -> ViewerState:
+    """
+    (repost_uri, like_uri) voor dit account: direct uit de kandidaat als dit account de feed zelf ophaalde
+    (en er nog niks mee gedaan heeft), anders via de gebundelde getPosts call (zie ViewerStateLoader).
+    """
+    key = (label, candidate.uri)
+    # viewer None = onbekend (bv. uit de index of van schijf), dan altijd opnieuw vragen
+    if entry.viewer_label == label and candidate.viewer is not None and key not in entry.viewer_used:
+        entry.viewer_used.add(key)
+        return candidate.viewer
+    return await viewer_state(client, candidate)
+
+
+async def viewer_states_for(
+    client: "AsyncClient", label: str, picks: List[Tuple[PostCandidate, CachedFeed]]
+) -> List[Union[ViewerState, BaseException]]:
+    """
+    viewer_state_for() voor alle gekozen posts van dit account tegelijk: wat niet in de
+    kandidaat zelf zit gaat samen naar getPosts (één call per GET_POSTS_BATCH URIs).
+    Per post de viewer-state of de exception, in de volgorde van picks.
+    """
+    return await asyncio.gather(
+        *(viewer_state_for(client, label, entry, post) for post, entry in picks), return_exceptions=True
+    )
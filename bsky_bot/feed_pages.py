@@ -0,0 +1,104 @@
+import os
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from bsky_bot.candidates import PostCandidate, candidate_from_feed_item, candidate_from_feed_json
+
+if TYPE_CHECKING:
+    from atproto_client import AsyncClient
+
+# Opt-in: feed/lijst responses als ruwe JSON lezen en direct PostCandidates maken, zonder
+# de atproto modellen (pydantic validatie van 50-100 volledige posts per pagina) te bouwen.
+# Per job aan te zetten via FetchSettings(raw_json=True), voor alles via BSKY_RAW_JSON=1.
+RAW_JSON = os.getenv("BSKY_RAW_JSON", "0") == "1"
+
+AUTHOR_FEED = "app.bsky.feed.getAuthorFeed"
+GENERATOR_FEED = "app.bsky.feed.getFeed"
+LIST = "app.bsky.graph.getList"
+
+# Max items per feed call (atproto validatie)
+MAX_PAGE = 100
+
+Page = Tuple[List[PostCandidate], Optional[str]]
+
+
+async def query_json(client: "AsyncClient", nsid: str, params: Any) -> Dict[str, Any]:
+    """
+    XRPC query zonder response model: de JSON zoals atproto hem al geparsed heeft.
+    Gaat door dezelfde client (sessie, refresh, rate limits, connection pool).
+    """
+    resp = await client.invoke_query(nsid, params=params, output_encoding="application/json")
+    content = resp.content
+    if not isinstance(content, dict):
+        raise ValueError(f"{nsid}: geen JSON object in response")
+    return content
+
+
+async def author_feed_page(
+    client: "AsyncClient",
+    actor: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    raw_json: bool = RAW_JSON,
+) -> Page:
+    """Eén pagina van een author feed (zonder replies) als (kandidaten, volgende cursor)."""
+    if not raw_json:
+        resp = await client.get_author_feed(actor=actor, limit=limit, filter="posts_no_replies", cursor=cursor)
+        return [candidate_from_feed_item(it) for it in resp.feed or []], getattr(resp, "cursor", None)
+
+    from atproto_client import models
+
+    params = models.AppBskyFeedGetAuthorFeed.Params(actor=actor, limit=limit, filter="posts_no_replies", cursor=cursor)
+    data = await query_json(client, AUTHOR_FEED, params)
+    return [candidate_from_feed_json(it) for it in data.get("feed") or []], data.get("cursor")
+
+
+async def author_feed_pages(
+    client: "AsyncClient",
+    actor: str,
+    first_page: int,
+    limit: int,
+    raw_json: bool = RAW_JSON,
+    next_page: Optional[Callable[[], int]] = None,
+) -> AsyncIterator[List[PostCandidate]]:
+    """
+    Author feed pagina voor pagina: eerst first_page items, daarna telkens twee keer zo veel
+    of wat next_page() zegt (max MAX_PAGE per call), tot limit items in totaal (harde grens)
+    of het einde van de feed.
+    De caller filtert per pagina en stopt zodra hij genoeg heeft; dan wordt er niks meer opgehaald.
+    """
+    cursor = None
+    fetched = 0
+    page = max(1, first_page)
+    while fetched < limit:
+        items, cursor = await author_feed_page(
+            client, actor, min(page, limit - fetched, MAX_PAGE), cursor=cursor, raw_json=raw_json
+        )
+        fetched += len(items)
+        if items:
+            yield items
+        if not cursor or not items:
+            return
+        page = max(1, next_page()) if next_page else page * 2
+
+
+async def generator_feed_page(
+    client: "AsyncClient",
+    feed_uri: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    raw_json: bool = RAW_JSON,
+) -> Page:
+    """Eén pagina van een custom (generator) feed als (kandidaten, volgende cursor)."""
+    if not raw_json:
+        # Sommige versies hebben client.get_feed, andere client.app.bsky.feed.get_feed
+        try:
+            resp = await client.app.bsky.feed.get_feed({"feed": feed_uri, "limit": limit, "cursor": cursor})
+        except AttributeError:
+            resp = await client.get_feed(feed=feed_uri, limit=limit, cursor=cursor)  # fallback
+        return [candidate_from_feed_item(it) for it in getattr(resp, "feed", []) or []], getattr(resp, "cursor", None)
+
+    from atproto_client import models
+
+    params = models.AppBskyFeedGetFeed.Params(feed=feed_uri, limit=limit, cursor=cursor)
+    data = await query_json(client, GENERATOR_FEED, params)
+    return [candidate_from_feed_json(it) for it in data.get("feed") or []], data.get("cursor")
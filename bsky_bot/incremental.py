@@ -0,0 +1,154 @@
+import math
+import time
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+
+from bsky_bot.candidate_index import FetchStats, get_index
+from bsky_bot.candidates import PostCandidate
+from bsky_bot.feed_pages import MAX_PAGE, RAW_JSON, author_feed_pages
+from bsky_bot.logs import log_event
+from bsky_bot.metrics import METRICS, RESPONSE_BYTES
+
+if TYPE_CHECKING:
+    from atproto_client import AsyncClient
+
+# Eens per zoveel tijd toch een volledige fetch, zodat verwijderde posts uit de index verdwijnen
+FULL_REFRESH_SECONDS = 24 * 3600
+
+# Paginagrootte per actor uit z'n historie (aandeel geldige items in eerdere fetches).
+# Nieuwe actor: alsof we al PRIOR_ITEMS items zagen waarvan PRIOR_VALID_RATIO geldig.
+PRIOR_ITEMS = 4
+PRIOR_VALID_RATIO = 0.5
+MIN_VALID_RATIO = 0.05   # ondergrens, anders wordt de pagina bij een tekst-account altijd MAX_PAGE
+PAGE_MARGIN = 1.25       # iets ruimer dan verwacht, zodat één pagina meestal genoeg is
+MIN_PAGE = 5
+# Max verwachte response per pagina (bytes per item uit de historie): accounts met zware items
+# (veel embeds/lange threads) krijgen kleinere pagina's, zodat één response niet tegen de read timeout loopt
+PAGE_BYTES_BUDGET = 256 * 1024
+
+
+def page_size(need: int, stats: FetchStats, limit: int, bytes_per_item: float = 0.0) -> int:
+    """
+    Kleinste pagina die naar verwachting `need` geldige items oplevert (tussen MIN_PAGE en limit),
+    en niet groter dan PAGE_BYTES_BUDGET bij bytes_per_item (0 = onbekend, geen grens).
+    """
+    ratio = max(stats.valid_ratio, MIN_VALID_RATIO)
+    size = min(limit, MAX_PAGE, math.ceil(need / ratio * PAGE_MARGIN))
+    if bytes_per_item > 0:
+        size = min(size, int(PAGE_BYTES_BUDGET // bytes_per_item))
+    return max(MIN_PAGE, size)
+
+
+def _with_prior(stats: Optional[FetchStats]) -> FetchStats:
+    prior = FetchStats(items=PRIOR_ITEMS, valid=PRIOR_ITEMS * PRIOR_VALID_RATIO, bytes=0.0)
+    if stats is None:
+        return prior
+    return FetchStats(items=stats.items + prior.items, valid=stats.valid + prior.valid, bytes=stats.bytes)
+
+
+async def fetch_author_candidates_incremental(
+    client: "AsyncClient",
+    actor: str,
+    namespace: str,
+    is_valid: Callable[[PostCandidate], bool],
+    limit: int,
+    first_page: int,
+    want: int,
+    raw_json: bool = RAW_JSON,
+    query_actor: Optional[str] = None,
+) -> List[PostCandidate]:
+    """
+    Author feed kandidaten ophalen, maar alleen wat nieuw is sinds de vorige run.
+
+    Per actor staat in de CandidateIndex de high-water-mark (nieuwste item-tijd), alle
+    eerder geziene items (compact, met 'geldig' vlag) en hoeveel van de opgehaalde items
+    geldig waren (FetchStats). Volgende run:
+    - eerst een kleine pagina (first_page), pas via de cursor verder als de
+      high-water-mark daar nog niet in zat
+    - volledige fetch en vervolgpagina's: zo groot als nodig voor de ontbrekende geldige
+      items volgens het aandeel geldig van deze actor (zie page_size), bijgesteld met wat
+      deze fetch al zag, en begrensd door de bytes per item van deze actor (PAGE_BYTES_BUDGET)
+    - stoppen zodra er `want` nieuwe geldige items zijn, en nooit meer dan limit items
+    - items worden direct PostCandidate; de ruwe atproto modellen worden niet bewaard
+    - high-water-mark niet gevonden, of FULL_REFRESH_SECONDS verstreken:
+      alles van deze actor vervangen door wat nu opgehaald is
+
+    Geeft de laatste `want` geldige kandidaten terug (nieuwste eerst). Alleen de net
+    opgehaalde hebben viewer-state; de rest wordt per account apart opgehaald.
+
+    query_actor: waarmee de feed opgevraagd wordt (bv. de DID), als dat niet `actor` zelf is;
+    de index blijft op `actor`.
+    """
+    index = get_index()
+    hwm, full_at = index.actor_state(namespace, actor)
+    full = not hwm or time.time() - full_at > FULL_REFRESH_SECONDS
+
+    history = index.fetch_stats(namespace, actor)
+    prior = _with_prior(history)
+    bytes_per_item = history.bytes_per_item if history else 0.0
+
+    rows: List[Tuple[PostCandidate, bool]] = []
+    n_valid = 0
+    n_fetched = 0
+    n_pages = 0
+    reached = False
+
+    def next_page() -> int:
+        # historie + wat deze fetch al zag
+        seen = FetchStats(items=prior.items + len(rows), valid=prior.valid + n_valid, bytes=0.0)
+        return page_size(want - n_valid, seen, limit - n_fetched, bytes_per_item)
+
+    # volledig: meteen groot genoeg voor `want`; incrementeel verwachten we maar een paar nieuwe
+    pages = author_feed_pages(
+        client,
+        query_actor or actor,
+        first_page=page_size(want, prior, limit, bytes_per_item) if full else first_page,
+        limit=limit,
+        raw_json=raw_json,
+        next_page=next_page,
+    )
+    bytes_before = RESPONSE_BYTES.get()
+    # items komen direct compact binnen; de ruwe pagina valt meteen weg
+    async for items in pages:
+        n_pages += 1
+        n_fetched += len(items)
+        for c in items:
+            if not full and c.sort_ts <= hwm:
+                reached = True
+                break
+            valid = is_valid(c)
+            rows.append((c, valid))
+            n_valid += valid
+        if reached or n_valid >= want:
+            break
+    n_bytes = RESPONSE_BYTES.get() - bytes_before
+
+    index.ingest(
+        namespace,
+        actor,
+        rows,
+        hwm=rows[0][0].sort_ts if rows else hwm,
+        replace=not reached,
+    )
+
+    # bytes naar rato: bij een incrementele fetch is de staart van de laatste pagina al bekend
+    index.record_fetch(namespace, actor, len(rows), n_valid, n_bytes * len(rows) // n_fetched if n_fetched else 0)
+    predicted = prior.valid_ratio * len(rows)
+    METRICS.incr("feed_pages", n_pages)
+    METRICS.incr("feed_items", len(rows))
+    METRICS.incr("feed_valid", n_valid)
+    METRICS.incr("feed_valid_predicted", predicted)
+
+    fresh = {c.uri: c for c, valid in rows if valid}
+    pool = [fresh.get(c.uri, c) for c in index.last_valid(namespace, actor, want)]
+
+    # één regel per actor per run: gesampled zoals de per-post regels (BSKY_LOG_SAMPLE),
+    # het totaal staat in de metrics samenvatting ("author feeds")
+    mode = "incrementeel" if reached else ("genoeg" if n_valid >= want else "volledig")
+    log_event(
+        "author_feed",
+        "Author feed %s: %d nieuwe items (%s), %d kandidaten; %d pagina's, %d geldig (voorspeld %.1f, %s), %.1f KB",
+        actor, len(rows), mode, len(pool),
+        n_pages, n_valid, predicted, f"{history.valid_ratio:.0%} geldig" if history else "nieuw", n_bytes / 1024,
+        actor=actor, mode=mode, items=len(rows), pages=n_pages, valid=n_valid, bytes=n_bytes,
+    )
+    return pool
@@ -0,0 +1,126 @@
+import re
+import time
+import logging
+from typing import TYPE_CHECKING, AsyncIterable, AsyncIterator, Callable, List, NamedTuple, Optional, Tuple
+
+from bsky_bot.feed_pages import LIST, RAW_JSON, query_json
+from bsky_bot.state import load_json, save_json
+
+if TYPE_CHECKING:
+    from atproto_client import AsyncClient
+
+
+class ListMember(NamedTuple):
+    did: str      # stabiel, gebruiken voor API calls en cache keys
+    handle: str   # alleen informatief (kan veranderen)
+
+
+def _cache_file(list_uri: str) -> str:
+    return "lists/" + re.sub(r"[^A-Za-z0-9._-]", "_", list_uri) + ".json"
+
+
+async def iter_list_members(
+    client: "AsyncClient", list_uri: str, page_limit: int = 100, raw_json: bool = RAW_JSON
+) -> AsyncIterator[ListMember]:
+    """
+    Yield members uit een Bluesky lijst (paginated).
+    We geven (did, handle) terug; de DID is stabiel en gebruiken we voor de API calls.
+    """
+    cursor = None
+    while True:
+        if raw_json:
+            members, cursor = await _list_page_json(client, list_uri, page_limit, cursor)
+        else:
+            members, cursor = await _list_page(client, list_uri, page_limit, cursor)
+        for member in members:
+            yield member
+
+        if not cursor:
+            break
+
+
+async def _list_page(
+    client: "AsyncClient", list_uri: str, limit: int, cursor: Optional[str]
+) -> Tuple[List[ListMember], Optional[str]]:
+    resp = await client.app.bsky.graph.get_list({"list": list_uri, "limit": limit, "cursor": cursor})
+    members = []
+    for it in getattr(resp, "items", []) or []:
+        subj = getattr(it, "subject", None)
+        if subj and getattr(subj, "handle", None):
+            members.append(ListMember(subj.did, subj.handle))
+    return members, getattr(resp, "cursor", None)
+
+
+async def _list_page_json(
+    client: "AsyncClient", list_uri: str, limit: int, cursor: Optional[str]
+) -> Tuple[List[ListMember], Optional[str]]:
+    from atproto_client import models
+
+    data = await query_json(client, LIST, models.AppBskyGraphGetList.Params(list=list_uri, limit=limit, cursor=cursor))
+    members = []
+    for it in data.get("items") or []:
+        subj = it.get("subject")
+        if subj and subj.get("handle"):
+            members.append(ListMember(subj["did"], subj["handle"]))
+    return members, data.get("cursor")
+
+
+async def probe_list_head(client: "AsyncClient", list_uri: str, limit: int) -> List[str]:
+    """
+    DIDs uit de eerste `limit` items van de lijst (nieuwst toegevoegd eerst), net zo
+    opgeschoond als de gecachte members (zonder handle weg, ontdubbeld). Daardoor is het
+    resultaat altijd een prefix van de members, ook als er dubbelen in de kop zitten.
+    """
+    members, _ = await _list_page(client, list_uri, limit, None)
+    return list(dict.fromkeys(m.did for m in members))
+
+
+async def cached_list_members(
+    client: "AsyncClient",
+    list_uri: str,
+    paginate: Callable[[], AsyncIterable[ListMember]],
+    refresh_seconds: int,
+    probe_limit: int,
+) -> AsyncIterator[ListMember]:
+    """
+    Members van een lijst, bij voorkeur uit STATE_DIR/lists/ i.p.v. opnieuw pagineren.
+
+    Cache wordt gebruikt als:
+    - hij jonger is dan refresh_seconds, én
+    - een goedkope probe (eerste probe_limit items) gelijk is aan de kop van de bewaarde members
+      (nieuwe members komen bovenaan, dus toevoegingen zien we meteen)
+    Verwijderingen verderop in de lijst zien we pas na refresh_seconds.
+
+    Anders wordt er gewoon gepagineerd (lazy, via paginate()) en opgeslagen zodra de hele lijst
+    binnen is. De caller moet de iterator dus helemaal leegtrekken (zie SharedIterator.fill),
+    ook als hij zelf eerder klaar is; anders komt er nooit een cache.
+    """
+    path = _cache_file(list_uri)
+    cached = load_json(path, default=None)
+    head: Optional[List[str]] = None
+
+    if cached and time.time() - cached.get("fetched_at", 0) < refresh_seconds:
+        try:
+            head = await probe_list_head(client, list_uri, probe_limit)
+        except Exception as e:
+            logging.warning("Lijst probe mislukt (%s), opnieuw pagineren.", e)
+        if head is not None and head == [did for did, _ in cached["members"][:len(head)]]:
+            logging.info("Lijst members uit cache (%d, probe ongewijzigd).", len(cached["members"]))
+            for did, handle in cached["members"]:
+                yield ListMember(did, handle)
+            return
+        logging.info("Lijst gewijzigd of probe mislukt, opnieuw pagineren.")
+
+    members: List[ListMember] = []
+    async for m in paginate():
+        members.append(m)
+        yield m
+
+    # pas opslaan als de hele lijst binnen is (anders geen geldige cache)
+    try:
+        save_json(path, {
+            "fetched_at": time.time(),
+            "members": [list(m) for m in members],
+        })
+    except Exception as e:
+        logging.warning("Lijst cache opslaan mislukt: %s", e)
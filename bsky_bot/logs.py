@@ -0,0 +1,123 @@
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from collections import Counter
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List, Tuple
+
+from bsky_bot.context import CURRENT_ACCOUNT, install_record_factory
+
+# --------------------------------------------------
+# Config
+# --------------------------------------------------
+# "text" = de gewone regels, "json" = één JSON object per regel (voor log tooling)
+LOG_FORMAT = os.getenv("BSKY_LOG_FORMAT", "text")
+LOG_LEVEL = os.getenv("BSKY_LOG_LEVEL", "INFO")
+# Per-post events (repost/like/...): 1 = elke regel, 0.1 = elke 10e per account+event,
+# 0 = geen losse regels, alleen de samenvatting per account. Warnings/errors altijd.
+LOG_SAMPLE = float(os.getenv("BSKY_LOG_SAMPLE", "1"))
+
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] [%(account)s] %(message)s"
+
+_EVERY = 0 if LOG_SAMPLE <= 0 else max(1, round(1 / LOG_SAMPLE))
+
+_lock = threading.Lock()
+_events: Counter = Counter()   # (account, event) -> aantal
+_logged: Counter = Counter()   # (account, event) -> daarvan als regel gelogd
+
+
+class JsonFormatter(logging.Formatter):
+    """Eén regel JSON per record; events krijgen hun velden erbij."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data: Dict[str, Any] = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "account": getattr(record, "account", "main"),
+            "msg": record.getMessage().strip(),
+        }
+        event = getattr(record, "event", None)
+        if event:
+            data["event"] = event
+            data.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    Zet het record ongewijzigd op de queue: message formatteren (en JSON maken) gebeurt
+    in de listener thread, niet in de event loop. De args zijn strings/getallen/URIs,
+    die veranderen niet meer na het loggen.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT) -> None:
+    """
+    Vervanger van logging.basicConfig: alle records gaan via een queue naar één listener
+    thread die naar stderr schrijft, zodat loggen nooit op het I/O pad van de bots zit.
+    Net als basicConfig: niks doen als er al handlers zijn (tweede job in run_bots).
+    Elk record krijgt het huidige account mee (%(account)s, zie bsky_bot.context).
+    """
+    install_record_factory()
+    root = logging.getLogger()
+    if root.handlers:
+        return
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    listener = QueueListener(records, handler)
+    listener.start()
+    # bij afsluiten (ook sys.exit) eerst de queue leegschrijven
+    atexit.register(listener.stop)
+
+    root.addHandler(_DeferredQueueHandler(records))
+    root.setLevel(level)
+    # httpx logt elke request op INFO; die staan al per endpoint in de metrics
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def log_event(event: str, msg: str, *args: Any, level: int = logging.INFO, **fields: Any) -> None:
+    """
+    Per-post regel (repost, like, ...): altijd geteld per account, gelogd volgens LOG_SAMPLE.
+    fields komen in JSON mode als losse velden mee (uri, source, ...).
+    """
+    key = (CURRENT_ACCOUNT.get(), event)
+    with _lock:
+        _events[key] += 1
+        n = _events[key]
+        sampled = level >= logging.WARNING or (_EVERY and (n - 1) % _EVERY == 0)
+        if sampled:
+            _logged[key] += 1
+    if sampled:
+        logging.log(level, msg, *args, extra={"event": event, "fields": fields})
+
+
+def pop_event_counts(account: str) -> List[Tuple[str, int, int]]:
+    """[(event, aantal, daarvan gelogd)] voor één account; daarna weer vanaf 0 (volgende job)."""
+    with _lock:
+        keys = [key for key in _events if key[0] == account]
+        return sorted((key[1], _events.pop(key), _logged.pop(key, 0)) for key in keys)
+
+
+def log_event_summary(labels: List[str]) -> None:
+    """Samenvatting per account i.p.v. (of naast) de gesamplede per-post regels."""
+    for label in labels:
+        counts = pop_event_counts(label)
+        if not counts:
+            continue
+        parts = ", ".join(f"{event}={n}" for event, n, _ in counts)
+        skipped = sum(n - logged for _, n, logged in counts)
+        logging.info(
+            "Events %s: %s%s", label, parts, f" ({skipped} regels niet gelogd, sample {LOG_SAMPLE:g})" if skipped else "",
+            extra={"event": "account_summary", "fields": {event: n for event, n, _ in counts}},
+        )
@@ -0,0 +1,231 @@
+import os
+import time
+import logging
+import threading
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from bsky_bot.context import CURRENT_ACCOUNT
+from bsky_bot.state import save_json
+
+# --------------------------------------------------
+# Config
+# --------------------------------------------------
+# JSON samenvatting van de laatste run, relatief t.o.v. STATE_DIR (leeg = niet schrijven)
+METRICS_JSON = os.getenv("BSKY_METRICS_JSON", "metrics/last_run.json")
+# Prometheus textfile (node_exporter textfile collector), absoluut pad; leeg = niet schrijven
+METRICS_PROM = os.getenv("BSKY_METRICS_PROM", "")
+
+# Grenzen van de latency histogram buckets (seconden)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Response bytes die de huidige taak tot nu toe ontvangen heeft; verschil voor/na een call
+# = grootte van die response (bv. per author feed pagina)
+RESPONSE_BYTES: contextvars.ContextVar[int] = contextvars.ContextVar("response_bytes", default=0)
+
+
+@dataclass
+class CallStats:
+    """Alle calls naar één XRPC endpoint vanuit één account."""
+    count: int = 0
+    errors: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    seconds: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+
+    def percentile(self, p: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    def buckets(self) -> List[int]:
+        """Cumulatieve aantallen per LATENCY_BUCKETS grens (Prometheus stijl)."""
+        return [sum(1 for s in self.latencies if s <= le) for le in LATENCY_BUCKETS]
+
+
+class Metrics:
+    """
+    Verzamelt per run: elke XRPC call (via RateLimitedRequest, dus ook login en writes),
+    fase-tijden per account en losse tellers (reposts, likes, ...).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.calls: Dict[Tuple[str, str], CallStats] = {}       # (account, nsid)
+        self.phases: Dict[Tuple[str, str], float] = {}          # (account, fase) -> seconden
+        self.counters: Dict[Tuple[str, str], float] = {}        # (account, naam)
+
+    def observe_call(
+        self, account: str, nsid: str, seconds: float, error: bool, bytes_sent: int = 0, bytes_received: int = 0
+    ) -> None:
+        with self._lock:
+            stats = self.calls.setdefault((account, nsid), CallStats())
+            stats.count += 1
+            stats.errors += 1 if error else 0
+            stats.bytes_sent += bytes_sent
+            stats.bytes_received += bytes_received
+            stats.seconds += seconds
+            stats.latencies.append(seconds)
+
+    def add_phase(self, account: str, name: str, seconds: float) -> None:
+        with self._lock:
+            self.phases[(account, name)] = self.phases.get((account, name), 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str, account: Optional[str] = None) -> Iterator[None]:
+        """
+        Tijd in deze fase optellen voor `account` (default het huidige, CURRENT_ACCOUNT).
+        Overlappende taken tellen elk mee, dus de som kan groter zijn dan de wandkloktijd.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(account or CURRENT_ACCOUNT.get(), name, time.perf_counter() - start)
+
+    def incr(self, name: str, n: float = 1, account: Optional[str] = None) -> None:
+        key = (account or CURRENT_ACCOUNT.get(), name)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    # ---- export ----
+    def totals(self) -> Counter:
+        """Tellers opgeteld over alle accounts."""
+        totals: Counter = Counter()
+        with self._lock:
+            for (_, name), n in self.counters.items():
+                totals[name] += n
+        return totals
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints: Dict[str, CallStats] = {}
+            for (_, nsid), s in self.calls.items():
+                total = endpoints.setdefault(nsid, CallStats())
+                total.count += s.count
+                total.errors += s.errors
+                total.bytes_sent += s.bytes_sent
+                total.bytes_received += s.bytes_received
+                total.seconds += s.seconds
+                total.latencies.extend(s.latencies)
+
+            accounts: Dict[str, Dict[str, Any]] = {}
+            for (account, nsid), s in self.calls.items():
+                accounts.setdefault(account, {"calls": {}, "phases": {}, "counters": {}})["calls"][nsid] = {
+                    "count": s.count, "errors": s.errors,
+                }
+            for (account, name), secs in self.phases.items():
+                accounts.setdefault(account, {"calls": {}, "phases": {}, "counters": {}})["phases"][name] = round(secs, 3)
+            for (account, name), n in self.counters.items():
+                accounts.setdefault(account, {"calls": {}, "phases": {}, "counters": {}})["counters"][name] = round(n, 2)
+
+            return {
+                "started": self.started,
+                "duration_seconds": round(time.time() - self.started, 3),
+                "endpoints": {
+                    nsid: {
+                        "count": s.count,
+                        "errors": s.errors,
+                        "bytes_sent": s.bytes_sent,
+                        "bytes_received": s.bytes_received,
+                        "seconds": round(s.seconds, 3),
+                        "p50": round(s.percentile(0.5), 4),
+                        "p95": round(s.percentile(0.95), 4),
+                        "max": round(max(s.latencies, default=0.0), 4),
+                    }
+                    for nsid, s in sorted(endpoints.items())
+                },
+                "accounts": accounts,
+            }
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format (voor de textfile collector)."""
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            calls = sorted(self.calls.items())
+            phases = sorted(self.phases.items())
+            counters = sorted(self.counters.items())
+
+        metric("bsky_bot_requests_total", "counter", "XRPC calls per endpoint en account")
+        for (account, nsid), s in calls:
+            lines.append(f'bsky_bot_requests_total{{account="{account}",endpoint="{nsid}"}} {s.count}')
+        metric("bsky_bot_request_errors_total", "counter", "Mislukte XRPC calls (incl. 429)")
+        for (account, nsid), s in calls:
+            lines.append(f'bsky_bot_request_errors_total{{account="{account}",endpoint="{nsid}"}} {s.errors}')
+        metric("bsky_bot_request_bytes_total", "counter", "Request/response body bytes")
+        for (account, nsid), s in calls:
+            labels = f'account="{account}",endpoint="{nsid}"'
+            lines.append(f'bsky_bot_request_bytes_total{{{labels},direction="sent"}} {s.bytes_sent}')
+            lines.append(f'bsky_bot_request_bytes_total{{{labels},direction="received"}} {s.bytes_received}')
+        metric("bsky_bot_request_duration_seconds", "histogram", "Latency per XRPC call")
+        for (account, nsid), s in calls:
+            labels = f'account="{account}",endpoint="{nsid}"'
+            for le, n in zip(LATENCY_BUCKETS, s.buckets()):
+                lines.append(f'bsky_bot_request_duration_seconds_bucket{{{labels},le="{le}"}} {n}')
+            lines.append(f'bsky_bot_request_duration_seconds_bucket{{{labels},le="+Inf"}} {s.count}')
+            lines.append(f"bsky_bot_request_duration_seconds_sum{{{labels}}} {s.seconds:.6f}")
+            lines.append(f"bsky_bot_request_duration_seconds_count{{{labels}}} {s.count}")
+        metric("bsky_bot_phase_seconds", "gauge", "Tijd per fase per account in de laatste run")
+        for (account, name), secs in phases:
+            lines.append(f'bsky_bot_phase_seconds{{account="{account}",phase="{name}"}} {secs:.6f}')
+        metric("bsky_bot_events", "gauge", "Tellers van de laatste run (reposts, likes, ...)")
+        for (account, name), n in counters:
+            lines.append(f'bsky_bot_events{{account="{account}",event="{name}"}} {n:g}')
+        metric("bsky_bot_last_run_timestamp_seconds", "gauge", "Einde van de laatste run")
+        lines.append(f"bsky_bot_last_run_timestamp_seconds {time.time():.0f}")
+        metric("bsky_bot_last_run_duration_seconds", "gauge", "Duur van de laatste run")
+        lines.append(f"bsky_bot_last_run_duration_seconds {time.time() - self.started:.3f}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+def _write_prometheus(path: str, text: str) -> None:
+    # atomair, anders kan de collector een half bestand lezen
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def export_metrics() -> None:
+    """Aan het eind van main(): samenvatting loggen en als JSON / Prometheus textfile wegschrijven."""
+    summary = METRICS.summary()
+    for nsid, s in summary["endpoints"].items():
+        logging.info(
+            "Metrics %s: %d calls, %d fout, p50 %.0f ms, p95 %.0f ms, %.1f KB ontvangen",
+            nsid, s["count"], s["errors"], s["p50"] * 1000, s["p95"] * 1000, s["bytes_received"] / 1024,
+        )
+    for account, data in sorted(summary["accounts"].items()):
+        if data["phases"]:
+            phases = ", ".join(f"{name} {secs:.2f}s" for name, secs in sorted(data["phases"].items()))
+            logging.info("Metrics %s fases: %s", account, phases)
+    totals = METRICS.totals()
+    if totals["feed_items"]:
+        # voorspeld = historisch aandeel geldige items (per actor) x opgehaalde items
+        logging.info(
+            "Metrics author feeds: %d pagina's, %d items, %d geldig (voorspeld %.1f, verschil %+.0f%%)",
+            totals["feed_pages"], totals["feed_items"], totals["feed_valid"], totals["feed_valid_predicted"],
+            (totals["feed_valid"] / totals["feed_valid_predicted"] - 1) * 100 if totals["feed_valid_predicted"] else 0,
+        )
+
+    try:
+        if METRICS_JSON:
+            save_json(METRICS_JSON, summary)
+        if METRICS_PROM:
+            _write_prometheus(METRICS_PROM, METRICS.prometheus())
+    except Exception as e:
+        logging.warning("Metrics wegschrijven mislukt: %s", e)
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, List, Tuple
+
+from bsky_bot.accounts import get_client_for_account
+from bsky_bot.candidates import PostCandidate
+from bsky_bot.feed_cache import CachedFeed, FeedCache
+from bsky_bot.metrics import METRICS
+from bsky_bot.resolver import resolve_sources
+from bsky_bot.runner import run_accounts
+from bsky_bot.sources import FetchSettings, Source, fetch_candidates
+from bsky_bot.writes import WriteQueue, log_account_writes, plan_writes
+
+if TYPE_CHECKING:
+    from atproto_client import AsyncClient
+
+Pick = Tuple[PostCandidate, CachedFeed]
+
+
+@dataclass
+class SourceJob:
+    """
+    Repost-job over een vaste lijst bronnen (targets/feeds), per bot-account:
+    alle bronnen tegelijk lezen (gedeeld via cache) -> per bron kiezen -> viewer-state van
+    alle keuzes samen -> writes in bronvolgorde.
+
+    Het script levert alleen z'n eigen filter (is_valid_for) en keuze (pick);
+    pick(items, bron) krijgt de geldige kandidaten van één bron (nooit leeg).
+    """
+    sources: List[Source]
+    fetch: FetchSettings
+    cache: FeedCache
+    is_valid_for: Callable[[Source], Callable[[PostCandidate], bool]]
+    pick: Callable[[List[PostCandidate], str], List[PostCandidate]]
+    batch_writes: bool = True
+
+    async def read_source(self, client: "AsyncClient", label: str, source: Source) -> List[Pick]:
+        logging.info("=== Account %s: %s ===", label, source)
+        with METRICS.phase("read"):
+            try:
+                entry = await self.cache.get(
+                    source.key,
+                    label,
+                    lambda: fetch_candidates(client, source, self.fetch, self.is_valid_for(source)),
+                )
+            except Exception as e:
+                logging.error("Ophalen mislukt (%s): %s", source, e)
+                return []
+
+        if not entry.items:
+            logging.info("Geen geldige media-posts in %s, skip.", source)
+            return []
+        return [(post, entry) for post in self.pick(entry.items, str(source))]
+
+    async def process_account(self, label: str) -> None:
+        logging.info("=== Start account %s ===", label)
+        client = await get_client_for_account(label)
+        if not client:
+            return
+
+        # handles -> DIDs (één getProfiles batch voor alle bronnen, daarna uit de cache)
+        sources = await resolve_sources(client, self.sources)
+
+        # Reads voor alle bronnen tegelijk (begrensd door accounts.RATE_LIMITS.max_concurrent_reads) ...
+        tasks = [asyncio.ensure_future(self.read_source(client, label, source)) for source in sources]
+
+        # ... picks in bronvolgorde verzamelen, dus de repost-volgorde blijft gelijk ...
+        picks: List[Pick] = []
+        try:
+            for task in tasks:
+                picks.extend(await task)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        # ... en pas dan de viewer-state van allemaal samen (één getPosts call per 25 posts)
+        queue = WriteQueue(client, batch=self.batch_writes)
+        for write in await plan_writes(client, label, picks):
+            queue.submit(write)
+        log_account_writes(label, await queue.close())
+
+    async def run(self, labels: List[str], workers: int = 1) -> None:
+        """Alle accounts (max `workers` tegelijk), daarna de feed cache bewaren."""
+        await run_accounts(labels, self.process_account, workers=workers)
+        self.cache.save()
+        logging.info("Feed cache: %d fetches, %d hergebruikt", self.cache.misses, self.cache.hits)
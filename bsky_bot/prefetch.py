@@ -0,0 +1,90 @@
+import asyncio
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# einde van de bron in ready_batches
+_END = object()
+
+
+async def prefetch(
+    items: AsyncIterable[T], fn: Callable[[T], Awaitable[R]], in_flight: int
+) -> AsyncIterator[Tuple[T, R]]:
+    """
+    Draai fn(item) vooruit als losse taken, met maximaal in_flight tegelijk onderweg.
+    Yield (item, resultaat) zodra er één klaar is (volgorde van afronden, niet van items).
+
+    Bedoeld voor reads vóór de write-loop: terwijl de caller post, lopen de volgende
+    fetches al. Er wordt nooit meer dan in_flight vooruit gewerkt, dus geheugen blijft begrensd.
+    fn moet zelf zijn exceptions afvangen; een exception hier breekt de iteratie af.
+
+    Stopt de caller eerder (break/aclose), dan worden de lopende fetches geannuleerd.
+    """
+    it = items.__aiter__()
+    pending: Dict[asyncio.Task, T] = {}
+    exhausted = False
+
+    async def fill() -> None:
+        nonlocal exhausted
+        while not exhausted and len(pending) < max(1, in_flight):
+            try:
+                item = await it.__anext__()
+            except StopAsyncIteration:
+                exhausted = True
+                return
+            pending[asyncio.ensure_future(fn(item))] = item
+
+    try:
+        await fill()
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                item = pending.pop(task)
+                await fill()  # direct aanvullen, zodat er een fetch loopt terwijl de caller bezig is
+                yield item, task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def ready_batches(items: AsyncIterable[T], max_size: int) -> AsyncIterator[List[T]]:
+    """
+    Lees items op de achtergrond uit en yield ze in batches van wat er al klaar ligt:
+    het eerste item zodra het er is, plus alles wat intussen ook binnen is (max max_size).
+
+    Zo wacht de caller nooit op een volle batch, maar krijgt hij vanzelf grotere batches
+    zolang hij zelf bezig is (bv. met writes). Er ligt nooit meer dan max_size vooruit.
+    Een exception uit items komt na de laatste batch bij de caller.
+    """
+    queue: "asyncio.Queue[Tuple[object, Optional[Exception]]]" = asyncio.Queue(maxsize=max(1, max_size))
+
+    async def pump() -> None:
+        try:
+            async for item in items:
+                await queue.put((item, None))
+        except Exception as e:
+            await queue.put((_END, e))
+            return
+        await queue.put((_END, None))
+
+    task = asyncio.ensure_future(pump())
+    try:
+        while True:
+            item, error = await queue.get()
+            batch: List[T] = []
+            while item is not _END:
+                batch.append(item)  # type: ignore[arg-type]
+                if len(batch) >= max_size or queue.empty():
+                    break
+                item, error = queue.get_nowait()
+            if batch:
+                yield batch
+            if item is _END:
+                if error is not None:
+                    raise error
+                return
+    finally:
+        # wachten tot de pump echt gestopt is, anders loopt items nog als de caller die sluit
+        task.cancel()
+        await asyncio.wait([task])
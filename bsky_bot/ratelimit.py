@@ -0,0 +1,125 @@
+import time
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Mapping, Optional
+
+# Als de server zegt dat er nog maar zoveel over is, wachten we tot de reset
+SERVER_RESERVE = 2
+# Geen reset header bij een 429: zo lang wachten
+DEFAULT_BACKOFF_SECONDS = 30.0
+# ratelimit-reset is in hele epoch seconden (naar beneden afgerond): zo lang extra wachten,
+# anders komt de retry nog vóór de echte reset en krijgt hij meteen weer een 429
+RESET_MARGIN_SECONDS = 1.0
+
+
+class RateLimitWaitTooLong(RuntimeError):
+    """De server-reset ligt verder weg dan RateLimits.max_server_wait; de call faalt meteen."""
+
+
+@dataclass
+class RateLimits:
+    """
+    Token bucket instellingen per bot-account.
+    writes = POST (repost, like, delete, ...), reads = GET (feeds, lijsten, posts).
+    max_concurrent_reads: hoeveel reads van dit account tegelijk onderweg mogen zijn.
+    max_server_wait: langer wachten we niet op een ratelimit-reset van de server (bv. een daglimiet);
+    calls falen dan meteen tot de reset, zodat een cron-run niet tot de job-timeout blijft hangen.
+    """
+    writes_per_second: float = 2.0
+    write_burst: int = 10
+    reads_per_second: float = 10.0
+    read_burst: int = 30
+    max_concurrent_reads: int = 8
+    max_server_wait: float = 600.0
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int, name: str, max_server_wait: float = 600.0) -> None:
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.name = name
+        self.max_server_wait = max_server_wait
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0  # wall-clock (time.time), gezet door server headers
+        self._lock = threading.Lock()
+        self.waited = 0.0          # totale wachttijd, voor de samenvatting
+
+    def block_until(self, wall_ts: float) -> None:
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, wall_ts)
+
+    def _take(self) -> float:
+        """Pak een token; geeft 0 terug als dat lukte, anders hoe lang eerst te wachten."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            wait = self._blocked_until - time.time()
+            if wait > self.max_server_wait:
+                raise RateLimitWaitTooLong(
+                    f"rate limit {self.name} pas over {wait / 60:.0f} min weer vrij (max {self.max_server_wait:.0f}s wachten)"
+                )
+            if wait > 0:
+                return wait
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate if self.rate > 0 else 1.0
+
+    async def acquire(self) -> None:
+        """
+        Wacht alleen als budget (eigen bucket of server) op is.
+        Raise't RateLimitWaitTooLong als de server-reset verder weg ligt dan max_server_wait.
+        """
+        while True:
+            wait = self._take()
+            if wait <= 0:
+                return
+            self.waited += wait
+            await asyncio.sleep(wait)
+
+
+class AccountRateLimiter:
+    def __init__(self, label: str, limits: RateLimits) -> None:
+        self.label = label
+        self.writes = TokenBucket(limits.writes_per_second, limits.write_burst, "writes", limits.max_server_wait)
+        self.reads = TokenBucket(limits.reads_per_second, limits.read_burst, "reads", limits.max_server_wait)
+        self.read_slots = asyncio.Semaphore(max(1, limits.max_concurrent_reads))
+
+    def bucket_for(self, method: str) -> TokenBucket:
+        return self.reads if method.upper() == "GET" else self.writes
+
+    def observe(self, bucket: TokenBucket, headers: Mapping[str, Any], exceeded: bool = False) -> None:
+        """
+        Lees ratelimit-remaining / ratelimit-reset (epoch seconden) uit de response.
+        Bijna op (of 429) -> bucket blokkeren tot de reset.
+        """
+        remaining = _int_header(headers, "ratelimit-remaining")
+        reset = _int_header(headers, "ratelimit-reset")
+
+        if exceeded or (remaining is not None and remaining <= SERVER_RESERVE):
+            until = float(reset) + RESET_MARGIN_SECONDS if reset else time.time() + DEFAULT_BACKOFF_SECONDS
+            if until - time.time() > bucket.max_server_wait:
+                logging.error(
+                    "Rate limit %s (%s) op tot %s, te lang om te wachten: calls falen tot dan.",
+                    bucket.name, self.label, time.strftime("%H:%M:%S", time.localtime(until)),
+                )
+            else:
+                logging.warning(
+                    "Rate limit %s (%s) bijna/helemaal op, wachten tot %s.",
+                    bucket.name, self.label, time.strftime("%H:%M:%S", time.localtime(until)),
+                )
+            bucket.block_until(until)
+
+
+def _int_header(headers: Mapping[str, Any], name: str) -> Optional[int]:
+    value = headers.get(name) if headers else None
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
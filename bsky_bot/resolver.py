@@ -0,0 +1,128 @@
+import time
+import asyncio
+import logging
+import weakref
+from dataclasses import replace
+from typing import TYPE_CHECKING, Dict, Iterable, List, MutableMapping, Optional
+
+from bsky_bot.sources import FeedSource, ListSource, Source, TargetSource
+from bsky_bot.state import load_json, save_json
+
+if TYPE_CHECKING:
+    from atproto_client import AsyncClient
+
+# handle -> DID mapping op schijf; handles wisselen zelden van DID
+RESOLVER_FILE = "resolver/handles.json"
+HANDLE_TTL_SECONDS = 24 * 3600
+
+# app.bsky.actor.getProfiles accepteert max 25 actors per call
+GET_PROFILES_BATCH = 25
+
+# Eén resolve tegelijk per event loop: parallelle accounts wachten en vinden daarna alles in de cache
+_LOCKS: MutableMapping[asyncio.AbstractEventLoop, asyncio.Lock] = weakref.WeakKeyDictionary()
+
+
+def _authority(uri: str) -> str:
+    """at://<authority>/... -> authority (DID of handle)."""
+    return uri[len("at://"):].split("/", 1)[0] if uri.startswith("at://") else ""
+
+
+def _with_authority(uri: str, did: str) -> str:
+    rest = uri[len("at://"):].split("/", 1)
+    return f"at://{did}/{rest[1]}" if len(rest) > 1 else f"at://{did}"
+
+
+class HandleCache:
+    """handle -> (DID, opgehaald op), met TTL; in-memory voor deze run en op schijf voor volgende runs."""
+
+    def __init__(self, ttl_seconds: int = HANDLE_TTL_SECONDS) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._entries: Optional[Dict[str, Dict]] = None
+        self.dirty = False
+
+    def _load(self) -> Dict[str, Dict]:
+        if self._entries is None:
+            self._entries = load_json(RESOLVER_FILE, default={}) or {}
+        return self._entries
+
+    def get(self, handle: str) -> Optional[str]:
+        entry = self._load().get(handle)
+        if entry and time.time() - entry.get("at", 0) < self.ttl_seconds:
+            return entry.get("did")
+        return None
+
+    def put(self, handle: str, did: str) -> None:
+        self._load()[handle] = {"did": did, "at": time.time()}
+        self.dirty = True
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        now = time.time()
+        entries = {h: e for h, e in self._load().items() if now - e.get("at", 0) < self.ttl_seconds}
+        try:
+            save_json(RESOLVER_FILE, entries)
+            self.dirty = False
+        except Exception as e:
+            logging.warning("Resolver cache opslaan mislukt: %s", e)
+
+
+HANDLES = HandleCache()
+
+
+async def resolve_handles(client: "AsyncClient", handles: Iterable[str]) -> Dict[str, str]:
+    """
+    handle -> DID voor alle handles: eerst uit de cache, de rest in batches van
+    GET_PROFILES_BATCH via app.bsky.actor.getProfiles. Onbekende handles ontbreken in het
+    resultaat (dan blijft de caller gewoon de handle gebruiken).
+    """
+    wanted = sorted({h.lower() for h in handles if h and not h.startswith("did:")})
+    lock = _LOCKS.setdefault(asyncio.get_running_loop(), asyncio.Lock())
+    async with lock:
+        resolved = {h: did for h in wanted if (did := HANDLES.get(h))}
+        missing = [h for h in wanted if h not in resolved]
+
+        for i in range(0, len(missing), GET_PROFILES_BATCH):
+            batch = missing[i:i + GET_PROFILES_BATCH]
+            try:
+                resp = await client.get_profiles(actors=batch)
+            except Exception as e:
+                logging.warning("Handles resolven mislukt (%d handles): %s", len(batch), e)
+                continue
+            for profile in resp.profiles or []:
+                handle = (profile.handle or "").lower()
+                if handle in batch:
+                    resolved[handle] = profile.did
+                    HANDLES.put(handle, profile.did)
+
+        if missing:
+            logging.info(
+                "Handles: %d uit cache, %d via getProfiles, %d onbekend",
+                len(wanted) - len(missing), len(resolved) - (len(wanted) - len(missing)), len(wanted) - len(resolved),
+            )
+        HANDLES.save()
+    return resolved
+
+
+async def resolve_sources(client: "AsyncClient", sources: Iterable[Source]) -> List[Source]:
+    """
+    Bronnen met DIDs i.p.v. handles, zodat de server niet bij elke call de handle hoeft te resolven.
+    Targets houden hun handle (filters en logs gebruiken die) en krijgen de DID erbij;
+    feed/lijst URIs met een handle als authority worden herschreven naar de DID.
+    """
+    sources = list(sources)
+    handles = [s.actor if isinstance(s, TargetSource) else _authority(s.uri) for s in sources]
+    dids = await resolve_handles(client, handles)
+
+    out: List[Source] = []
+    for source, handle in zip(sources, handles):
+        did = dids.get(handle.lower())
+        if did is None:
+            out.append(source)
+        elif isinstance(source, TargetSource):
+            out.append(replace(source, did=did))
+        elif isinstance(source, (FeedSource, ListSource)):
+            out.append(replace(source, uri=_with_authority(source.uri, did)))
+        else:
+            out.append(source)
+    return out
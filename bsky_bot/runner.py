@@ -0,0 +1,65 @@
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List
+
+from bsky_bot.context import CURRENT_ACCOUNT
+from bsky_bot.logs import log_event_summary
+from bsky_bot.metrics import METRICS, export_metrics
+from bsky_bot.transport import log_connection_stats
+
+
+async def _timed(label: str, fn: Callable[[str], Awaitable[None]], timings: Dict[str, float]) -> None:
+    # alles wat deze taak (en z'n subtaken) logt krijgt het label, zodat door elkaar
+    # lopende logregels leesbaar blijven
+    CURRENT_ACCOUNT.set(label)
+    start = time.perf_counter()
+    try:
+        await fn(label)
+    except Exception as e:
+        logging.exception("Account %s crashte: %s", label, e)
+    finally:
+        timings[label] = time.perf_counter() - start
+        METRICS.add_phase(label, "total", timings[label])
+
+
+async def run_accounts(
+    labels: List[str], fn: Callable[[str], Awaitable[None]], workers: int = 1
+) -> Dict[str, float]:
+    """
+    Draai fn(label) voor elk bot-account.
+    workers=1 -> sequentieel (oude gedrag), >1 -> tot zoveel accounts tegelijk als asyncio taken.
+    Binnen één account bepaalt fn zelf de volgorde van de writes.
+
+    Geeft wall-time per account terug en logt een samenvatting.
+    """
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
+    slots = asyncio.Semaphore(max(1, workers))
+
+    async def one(label: str) -> None:
+        async with slots:
+            # eigen context per taak, dus CURRENT_ACCOUNT lekt niet naar andere accounts
+            await _timed(label, fn, timings)
+
+    await asyncio.gather(*(one(label) for label in labels))
+
+    log_event_summary(labels)
+
+    total = time.perf_counter() - start
+    sequential = sum(timings.values())
+    for label in labels:
+        if label in timings:
+            logging.info("Timing %s: %.1fs", label, timings[label])
+    logging.info(
+        "Timing totaal: %.1fs wall (som accounts %.1fs, speedup x%.2f, workers=%d)",
+        total, sequential, sequential / total if total > 0 else 1.0, workers,
+    )
+    return timings
+
+
+def run_main(main_async: Callable[[], Awaitable[None]]) -> None:
+    """main() van een los gestart script: de run zelf, daarna verbindingsstatistiek en metrics."""
+    asyncio.run(main_async())
+    log_connection_stats()
+    export_metrics()
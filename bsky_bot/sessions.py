@@ -0,0 +1,201 @@
+import os
+import time
+import base64
+import asyncio
+import hashlib
+import logging
+import weakref
+from typing import Any, Dict, MutableMapping, Optional
+
+# Alleen atproto_client laden, niet het hele atproto pakket (firehose, identity/DNS, crypto
+# gebruiken we niet). Deze module wordt pas geïmporteerd als er echt een client nodig is.
+import httpx
+from atproto_client import AsyncClient, Session, SessionEvent
+from atproto_client.exceptions import RateLimitExceededError
+from atproto_client.request import AsyncRequest
+
+from bsky_bot.metrics import METRICS, RESPONSE_BYTES
+from bsky_bot.ratelimit import AccountRateLimiter, RateLimits
+from bsky_bot.state import load_json, save_json
+from bsky_bot.transport import HttpSettings, client_kwargs
+
+# Andere PDS/AppView, bv. de lokale fake server uit bench/ (leeg = bsky.social)
+BASE_URL = os.getenv("BSKY_BASE_URL") or None
+
+# Sessie-strings (met refresh token = volledige toegang tot het account) versleuteld opslaan
+# met een sleutel afgeleid van deze secret. In GitHub Actions gaat STATE_DIR via actions/cache,
+# die ook PR workflows kunnen lezen: daar wordt zonder sleutel geen sessie bewaard.
+SESSION_KEY = os.getenv("BSKY_SESSION_KEY") or None
+IN_CI = os.getenv("GITHUB_ACTIONS") == "true"
+
+# Ingelogde clients per label, zodat één run nooit twee keer inlogt voor hetzelfde account
+# (bv. photo_accounts: eerst members ophalen, daarna reposten).
+# Per event loop, want de HTTP pool van een AsyncClient hoort bij z'n loop.
+_CLIENTS: MutableMapping[asyncio.AbstractEventLoop, Dict[str, AsyncClient]] = weakref.WeakKeyDictionary()
+_LOGIN_LOCKS: MutableMapping[asyncio.AbstractEventLoop, Dict[str, asyncio.Lock]] = weakref.WeakKeyDictionary()
+
+
+class RateLimitedRequest(AsyncRequest):
+    """
+    atproto AsyncRequest die voor elke call een token uit de juiste bucket pakt en na elke
+    response de rate-limit headers van de server verwerkt. Bij een 429 één keer opnieuw
+    na de reset. Reads gaan daarnaast door een semaphore (max_concurrent_reads), zodat
+    een fan-out van reads nooit onbegrensd wordt.
+    """
+
+    def __init__(self, limiter: AccountRateLimiter, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.limiter = limiter
+
+    def _new_instance(self) -> "RateLimitedRequest":
+        return type(self)(self.limiter, **self._client_kwargs)
+
+    async def _send_request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        if method.upper() == "GET":
+            async with self.limiter.read_slots:
+                return await self._send_limited(method, url, **kwargs)
+        return await self._send_limited(method, url, **kwargs)
+
+    async def _send_limited(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        bucket = self.limiter.bucket_for(method)
+        for attempt in range(2):
+            await bucket.acquire()
+            start = time.perf_counter()
+            try:
+                response = await super()._send_request(method, url, **kwargs)
+            except RateLimitExceededError as e:
+                self._observe(url, start, getattr(e, "response", None), error=True)
+                headers = e.response.headers if e.response else {}
+                self.limiter.observe(bucket, headers, exceeded=True)
+                if attempt:
+                    raise
+                continue
+            except Exception as e:
+                self._observe(url, start, getattr(e, "response", None), error=True)
+                raise
+            self._observe(url, start, response, error=False)
+            self.limiter.observe(bucket, response.headers)
+            return response
+        raise AssertionError("unreachable")
+
+    def _observe(self, url: str, start: float, response: Any, error: bool) -> None:
+        # alleen de HTTP call zelf; wachten op een token of read-slot telt niet mee
+        seconds = time.perf_counter() - start
+        sent = received = 0
+        if isinstance(response, httpx.Response):
+            received = len(response.content)
+            sent = len(response.request.content)
+        METRICS.observe_call(self.limiter.label, url.rsplit("/", 1)[-1], seconds, error, sent, received)
+        RESPONSE_BYTES.set(RESPONSE_BYTES.get() + received)
+
+
+def _session_file(label: str) -> str:
+    return f"sessions/{label}.json"
+
+
+def _fernet():
+    # cryptography komt mee met atproto; alleen geladen als er een sleutel is
+    from cryptography.fernet import Fernet
+
+    return Fernet(base64.urlsafe_b64encode(hashlib.sha256(SESSION_KEY.encode()).digest()))
+
+
+def _save_session(label: str, username: str, client: AsyncClient) -> None:
+    if not SESSION_KEY and IN_CI:
+        logging.info("Geen BSKY_SESSION_KEY in CI: sessie voor %s niet bewaard.", label)
+        return
+    try:
+        session = client.export_session_string()
+        data = {"username": username}
+        if SESSION_KEY:
+            data["session_enc"] = _fernet().encrypt(session.encode()).decode()
+        else:
+            data["session"] = session
+        save_json(_session_file(label), data, private=True)
+    except Exception as e:
+        logging.warning("Sessie opslaan mislukt voor %s: %s", label, e)
+
+
+def _stored_session(label: str, stored: Dict[str, Any]) -> Optional[str]:
+    """Sessie-string uit het bestand; None als er geen is of hij niet te ontsleutelen is."""
+    if "session_enc" not in stored:
+        return stored.get("session")
+    if not SESSION_KEY:
+        return None
+    try:
+        return _fernet().decrypt(stored["session_enc"].encode()).decode()
+    except Exception as e:
+        logging.info("Opgeslagen sessie voor %s niet te ontsleutelen (%s), opnieuw inloggen.", label, type(e).__name__)
+        return None
+
+
+def _new_client(label: str, username: str, limits: RateLimits, http: Optional[HttpSettings]) -> AsyncClient:
+    # eigen token buckets per account; alle calls (ook login/refresh) gaan erdoorheen.
+    # De HTTP connection pool is wel gedeeld door alle accounts.
+    request = RateLimitedRequest(AccountRateLimiter(label, limits), **client_kwargs(http))
+    client = AsyncClient(base_url=BASE_URL, request=request)
+
+    def on_session_change(event: SessionEvent, session: Session) -> None:
+        if event in (SessionEvent.CREATE, SessionEvent.REFRESH):
+            _save_session(label, username, client)
+
+    client.on_session_change(on_session_change)
+    return client
+
+
+async def _login_from_store(label: str, username: str, client: AsyncClient) -> bool:
+    stored = load_json(_session_file(label)) or {}
+    if stored.get("username") != username:
+        return False
+    session_string = _stored_session(label, stored)
+    if not session_string:
+        return False
+
+    try:
+        # Verlopen access token wordt door atproto zelf ververst (refreshSession),
+        # geen nieuwe createSession nodig.
+        await client.login(session_string=session_string)
+        return True
+    except Exception as e:
+        logging.info("Opgeslagen sessie voor %s niet meer bruikbaar (%s), opnieuw inloggen.", label, e)
+        return False
+
+
+async def login_with_session_cache(
+    label: str,
+    username: str,
+    password: str,
+    limits: Optional[RateLimits] = None,
+    http: Optional[HttpSettings] = None,
+) -> AsyncClient:
+    """
+    Geeft een ingelogde AsyncClient terug voor dit label:
+    1) al ingelogd in deze run -> dezelfde client
+    2) opgeslagen sessie-string -> importeren (refresh alleen als token verlopen is)
+    3) anders gewone login met wachtwoord
+
+    Nieuwe/ververste sessies worden direct weggeschreven.
+    Raise't de login-exception als ook de wachtwoord-login mislukt.
+
+    limits: token bucket instellingen voor dit account (default RateLimits()).
+    http: pool/timeouts van de gedeelde HTTP transport (default HttpSettings()).
+    """
+    loop = asyncio.get_running_loop()
+    clients = _CLIENTS.setdefault(loop, {})
+    lock = _LOGIN_LOCKS.setdefault(loop, {}).setdefault(label, asyncio.Lock())
+
+    # twee taken die tegelijk hetzelfde account vragen: maar één login
+    async with lock:
+        client = clients.get(label)
+        if client is not None:
+            return client
+
+        limits = limits or RateLimits()
+        client = _new_client(label, username, limits, http)
+        if not await _login_from_store(label, username, client):
+            # verse client, zodat er geen half-geïmporteerde sessie blijft hangen
+            client = _new_client(label, username, limits, http)
+            await client.login(username, password)
+
+        clients[label] = client
+        return client
@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import weakref
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, MutableMapping, Optional, Union
+
+from bsky_bot.candidates import PostCandidate
+from bsky_bot.feed_pages import RAW_JSON, author_feed_pages, generator_feed_page
+from bsky_bot.incremental import fetch_author_candidates_incremental
+from bsky_bot.list_cache import ListMember, cached_list_members, iter_list_members
+from bsky_bot.stream import unique
+from bsky_bot.uris import list_url_to_at_uri, normalize_feed_uri
+
+if TYPE_CHECKING:
+    from atproto_client import AsyncClient
+
+
+# --------------------------------------------------
+# Bronnen
+# --------------------------------------------------
+@dataclass(frozen=True)
+class TargetSource:
+    """Author feed van één account (handle of DID)."""
+    actor: str
+    did: Optional[str] = None  # via resolver.resolve_sources; dan vragen we de feed op DID op
+
+    @property
+    def query_actor(self) -> str:
+        return self.did or self.actor
+
+    @property
+    def key(self) -> str:
+        return f"author:{self.actor.lower()}"
+
+    def __str__(self) -> str:
+        return f"target {self.actor}"
+
+
+@dataclass(frozen=True)
+class FeedSource:
+    """Custom feed (feed generator), at:// URI."""
+    uri: str
+
+    @property
+    def key(self) -> str:
+        return f"feed:{self.uri}"
+
+    def __str__(self) -> str:
+        return f"feed {self.uri}"
+
+
+@dataclass(frozen=True)
+class ListSource:
+    """Lijst; de members worden elk een TargetSource."""
+    uri: str
+
+    @property
+    def key(self) -> str:
+        return f"list:{self.uri}"
+
+    def __str__(self) -> str:
+        return f"lijst {self.uri}"
+
+    def members(
+        self, client: "AsyncClient", refresh_seconds: int, probe_limit: int, raw_json: bool = RAW_JSON
+    ) -> AsyncIterator[ListMember]:
+        """Unieke members (lazy), bij voorkeur uit de lijst-cache."""
+        return cached_list_members(
+            client,
+            self.uri,
+            paginate=lambda: unique(  # unique, behoud volgorde
+                iter_list_members(client, self.uri, raw_json=raw_json), key=lambda m: m.did
+            ),
+            refresh_seconds=refresh_seconds,
+            probe_limit=probe_limit,
+        )
+
+
+Source = Union[TargetSource, FeedSource, ListSource]
+
+
+def target_sources(handles: Iterable[str]) -> List[TargetSource]:
+    """Lege handles (niet ingevulde config) worden overgeslagen; volgorde blijft."""
+    return [TargetSource(h.strip()) for h in handles if (h or "").strip()]
+
+
+def feed_sources(uris_or_urls: Iterable[str]) -> List[FeedSource]:
+    """Accepteert at:// URIs en bsky.app feed-links; lege worden overgeslagen."""
+    return [FeedSource(normalize_feed_uri(u)) for u in uris_or_urls if (u or "").strip()]
+
+
+def list_source(list_url: str) -> ListSource:
+    return ListSource(list_url_to_at_uri(list_url))
+
+
+# --------------------------------------------------
+# Ophalen
+# --------------------------------------------------
+@dataclass(frozen=True)
+class FetchSettings:
+    """Hoe een job z'n bronnen ophaalt; namespace scheidt de index/caches per job."""
+    namespace: str
+    author_feed_limit: int = 100        # harde grens: nooit meer author feed items per fetch
+    author_feed_first_page: int = 10    # eerste (kleine) pagina bij incrementeel ophalen
+    author_feed_incremental: bool = True
+    want: int = 100                     # max aantal kandidaten per author feed; stop met pagineren als die er zijn
+    feed_limit: int = 100               # max 100
+    raw_json: bool = RAW_JSON           # feeds als ruwe JSON i.p.v. atproto modellen (zie feed_pages)
+
+
+class _RunMemo:
+    """
+    Ruwe (ongefilterde) kandidaten per bron, gedeeld door alle jobs in dit proces,
+    zodat bv. twee jobs met dezelfde custom feed die maar één keer ophalen.
+    Alleen de eerste aanvrager krijgt de viewer-state mee (die hoort bij z'n eigen account);
+    de rest krijgt viewer=None en vraagt die zelf op.
+    """
+
+    def __init__(self) -> None:
+        self._futures: MutableMapping[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]] = (
+            weakref.WeakKeyDictionary()
+        )
+        self.hits = 0
+
+    async def get(self, key: str, fetch: Callable[[], Awaitable[List[PostCandidate]]]) -> List[PostCandidate]:
+        futures = self._futures.setdefault(asyncio.get_running_loop(), {})
+        fut = futures.get(key)
+        if fut is None:
+            fut = futures[key] = asyncio.ensure_future(fetch())
+            try:
+                return await fut
+            except Exception:
+                futures.pop(key, None)  # niet cachen, volgende aanvrager probeert opnieuw
+                raise
+
+        items = await fut
+        self.hits += 1
+        return [replace(c, viewer=None) for c in items]
+
+
+RAW_FEEDS = _RunMemo()
+
+
+async def _feed_candidates(client: "AsyncClient", feed_uri: str, limit: int, raw_json: bool) -> List[PostCandidate]:
+    candidates, _ = await generator_feed_page(client, feed_uri, limit, raw_json=raw_json)
+    return candidates
+
+
+async def fetch_candidates(
+    client: "AsyncClient",
+    source: Union[TargetSource, FeedSource],
+    settings: FetchSettings,
+    is_valid: Callable[[PostCandidate], bool],
+) -> List[PostCandidate]:
+    """
+    Geldige kandidaten van één bron, direct compact (PostCandidate) en gefilterd met is_valid.
+    Author feeds: incrementeel via de CandidateIndex als dat aan staat.
+    """
+    if isinstance(source, TargetSource):
+        if settings.author_feed_incremental:
+            return await fetch_author_candidates_incremental(
+                client,
+                source.actor,
+                namespace=settings.namespace,
+                is_valid=is_valid,
+                limit=settings.author_feed_limit,
+                first_page=settings.author_feed_first_page,
+                want=settings.want,
+                raw_json=settings.raw_json,
+                query_actor=source.query_actor,
+            )
+        valid: List[PostCandidate] = []
+        pages = author_feed_pages(
+            client,
+            source.query_actor,
+            first_page=max(settings.author_feed_first_page, settings.want),
+            limit=settings.author_feed_limit,
+            raw_json=settings.raw_json,
+        )
+        async for items in pages:
+            valid.extend(c for c in items if is_valid(c))
+            if len(valid) >= settings.want:
+                break
+        return valid[: settings.want]
+
+    if isinstance(source, FeedSource):
+        logging.info("Generator feed ophalen: %s (limit=%d)...", source.uri, settings.feed_limit)
+        raw = await RAW_FEEDS.get(
+            f"{source.key}:{settings.feed_limit}",
+            lambda: _feed_candidates(client, source.uri, settings.feed_limit, settings.raw_json),
+        )
+        return [c for c in raw if is_valid(c)]
+
+    raise TypeError(f"Kan geen kandidaten ophalen voor {source!r}")
@@ -0,0 +1,67 @@
+import sys
+import time
+import logging
+import importlib
+import subprocess
+from types import ModuleType
+from typing import Dict, List, Sequence, Tuple
+
+# Zo vroeg mogelijk geïmporteerd door de runner: telt als start van het proces
+STARTED = time.perf_counter()
+
+# Import -> duur in seconden, alleen voor wat via timed_import geladen is
+IMPORT_TIMES: Dict[str, float] = {}
+
+
+def timed_import(name: str) -> ModuleType:
+    """importlib.import_module, met de duur van de eerste (echte) import in IMPORT_TIMES."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    t0 = time.perf_counter()
+    module = importlib.import_module(name)
+    IMPORT_TIMES[name] = time.perf_counter() - t0
+    return module
+
+
+def log_startup_times() -> None:
+    parts = ", ".join(f"{name} {secs * 1000:.0f} ms" for name, secs in IMPORT_TIMES.items())
+    logging.info("Startup imports: %s", parts or "-")
+
+
+def importtime_report(modules: Sequence[str], top: int = 20) -> List[Tuple[str, int, int]]:
+    """
+    Draait `python -X importtime` in een apart proces (koude imports) en geeft de `top`
+    duurste imports terug als (module, self_us, cumulatief_us), duurste eerst.
+    """
+    code = "; ".join(f"import {m}" for m in modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import mislukt")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        # "import time:       self [us] |  cumulative | imported package"
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # kopregel
+        rows.append((fields[2].strip(), int(fields[0]), int(fields[1])))
+    rows.sort(key=lambda r: r[2], reverse=True)
+    return rows[:top]
+
+
+def log_importtime_report(modules: Sequence[str], top: int = 20) -> None:
+    try:
+        rows = importtime_report(modules, top)
+    except Exception as e:
+        logging.error("importtime meting mislukt: %s", e)
+        return
+    logging.info("Importtijd (%s), duurste %d:", ", ".join(modules), len(rows))
+    for name, self_us, cumulative_us in rows:
+        logging.info("  %8.1f ms  %8.1f ms self  %s", cumulative_us / 1000, self_us / 1000, name)
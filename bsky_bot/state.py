@@ -0,0 +1,46 @@
+import os
+import json
+import logging
+from typing import Any
+
+# --------------------------------------------------
+# Config
+# --------------------------------------------------
+# Map waarin we state tussen runs bewaren (sessies, caches).
+# In GitHub Actions wordt deze map via actions/cache tussen runs meegenomen; sessies staan
+# daarin alleen versleuteld (zie BSKY_SESSION_KEY in sessions.py).
+STATE_DIR = os.getenv("BSKY_STATE_DIR", ".bsky_state")
+
+
+def state_path(*parts: str) -> str:
+    path = os.path.join(STATE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def load_json(name: str, default: Any = None) -> Any:
+    """
+    Lees een JSON bestand uit STATE_DIR. Bij ontbreken of kapot bestand: default.
+    """
+    path = state_path(name)
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logging.warning("State %s onleesbaar, negeer: %s", name, e)
+        return default
+
+
+def save_json(name: str, data: Any, private: bool = False) -> None:
+    """
+    Schrijf atomair (eerst tmp, dan rename) zodat een afgebroken run niks half achterlaat.
+    private=True -> alleen leesbaar voor eigenaar (voor sessie-tokens).
+    """
+    path = state_path(name)
+    tmp = f"{path}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600 if private else 0o644)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
@@ -0,0 +1,117 @@
+import random
+import asyncio
+import logging
+from typing import AsyncIterable, AsyncIterator, Callable, Generic, Hashable, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+async def unique(items: AsyncIterable[T], key: Callable[[T], Hashable] = lambda x: x) -> AsyncIterator[T]:
+    """Lazy ontdubbelen, volgorde blijft behouden (zoals dict.fromkeys, maar streaming)."""
+    seen = set()
+    async for item in items:
+        k = key(item)
+        if k in seen:
+            continue
+        seen.add(k)
+        yield item
+
+
+async def rotate(items: AsyncIterable[T], start: int) -> AsyncIterator[T]:
+    """
+    Begin bij item `start` en geef de items daarvoor pas aan het eind (rondje).
+    Is de bron korter dan start, dan telt start modulo de lengte.
+    Alleen de overgeslagen kop wordt vastgehouden.
+    """
+    head: List[T] = []
+    async for item in items:
+        if len(head) < start:
+            head.append(item)
+            continue
+        yield item
+
+    if head and len(head) < start:
+        # bron korter dan start: de kop zelf is de hele lijst
+        i = start % len(head)
+        head = head[i:] + head[:i]
+    for item in head:
+        yield item
+
+
+async def shuffle_buffer(
+    items: AsyncIterable[T], size: int, rng: Optional[random.Random] = None
+) -> AsyncIterator[T]:
+    """
+    Willekeurige volgorde zonder alles in te lezen: houd een buffer van `size` items vast
+    en geef telkens een random item uit de buffer terug (vervangen door het volgende binnenkomende).
+    Eerste item komt er al uit zodra de buffer vol is (of de bron op is).
+    """
+    rng = rng or random
+    buf: List[T] = []
+    async for item in items:
+        if len(buf) < size:
+            buf.append(item)
+            continue
+        i = rng.randrange(size)
+        out, buf[i] = buf[i], item
+        yield out
+
+    rng.shuffle(buf)
+    for item in buf:
+        yield item
+
+
+class SharedIterator(Generic[T]):
+    """
+    Eén lazy bron die door meerdere taken (bot-accounts) los doorlopen kan worden.
+    De bron wordt maar één keer geconsumeerd (bv. één keer pagineren door get_list);
+    wat al binnen is wordt onthouden, dus elke iteratie begint gewoon vooraan.
+    Alleen de items zelf (bv. handles) worden bewaard, geen API-modellen.
+    """
+
+    def __init__(self, source: AsyncIterable[T]) -> None:
+        self._source = source.__aiter__()
+        self._items: List[T] = []
+        self._lock = asyncio.Lock()
+        self.exhausted = False
+
+    async def _get(self, i: int) -> Optional[List[T]]:
+        # [item] als er een item i is, anders None.
+        # Al binnen: zonder lock, anders wacht elke iteratie op een lopende pagina-fetch (bv. fill())
+        if i < len(self._items):
+            return [self._items[i]]
+        async with self._lock:
+            while len(self._items) <= i and not self.exhausted:
+                try:
+                    self._items.append(await self._source.__anext__())
+                except StopAsyncIteration:
+                    self.exhausted = True
+                except Exception as e:
+                    # bv. get_list pagina mislukt: doorgaan met wat we al hebben
+                    logging.error("Bron stopte onverwacht na %d items: %s", len(self._items), e)
+                    self.exhausted = True
+            if i < len(self._items):
+                return [self._items[i]]
+            return None
+
+    async def __aiter__(self) -> AsyncIterator[T]:
+        i = 0
+        while True:
+            got = await self._get(i)
+            if got is None:
+                return
+            yield got[0]
+            i += 1
+
+    async def fill(self) -> int:
+        """
+        Lees de bron helemaal in (bv. als achtergrondtaak), ook als geen enkele iteratie zo ver komt.
+        Geeft het totale aantal items terug.
+        """
+        while await self._get(len(self._items)) is not None:
+            pass
+        return len(self._items)
+
+    def __len__(self) -> int:
+        """Aantal items tot nu toe binnen (alles, als exhausted)."""
+        return len(self._items)
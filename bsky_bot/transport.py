@@ -0,0 +1,123 @@
+import asyncio
+import importlib.util
+import logging
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, MutableMapping, Optional
+
+import httpx
+
+
+@dataclass(frozen=True)
+class HttpSettings:
+    """
+    Eén gedeelde connection pool voor alle bot-accounts; alle calls gaan naar
+    dezelfde paar hosts (PDS, AppView), dus verbindingen open houden scheelt TLS handshakes.
+    """
+    max_connections: int = 20        # totaal open verbindingen (alle accounts samen)
+    max_keepalive: int = 10          # idle verbindingen die open blijven
+    keepalive_expiry: float = 60.0   # seconden dat een idle verbinding bewaard wordt
+    connect_timeout: float = 5.0
+    read_timeout: float = 30.0       # getAuthorFeed/getList met limit=100 kan even duren
+    write_timeout: float = 10.0
+    pool_timeout: float = 10.0       # wachten op een vrije verbinding uit de pool
+    http2: bool = False              # vereist het 'h2' package (pip install httpx[http2])
+
+
+class ConnectionStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connects = 0       # nieuwe TCP verbindingen
+        self.tls_handshakes = 0
+
+    async def trace(self, event: str, info: Dict[str, Any]) -> None:
+        # httpcore trace extension, bv. "connection.connect_tcp.started"
+        if event == "connection.connect_tcp.started":
+            with self._lock:
+                self.connects += 1
+        elif event == "connection.start_tls.started":
+            with self._lock:
+                self.tls_handshakes += 1
+
+    def count_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    @property
+    def reuse_ratio(self) -> float:
+        """Aandeel requests dat over een al open verbinding ging."""
+        if not self.requests:
+            return 0.0
+        return max(0.0, 1.0 - self.connects / self.requests)
+
+
+class PooledTransport(httpx.AsyncHTTPTransport):
+    """AsyncHTTPTransport die per request bijhoudt of er een nieuwe verbinding nodig was."""
+
+    def __init__(self, stats: ConnectionStats, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.stats.count_request()
+        request.extensions = {**request.extensions, "trace": self.stats.trace}
+        return await super().handle_async_request(request)
+
+
+# Per event loop: een async connection pool hoort bij de loop waarin hij gemaakt is
+_TRANSPORTS: MutableMapping[asyncio.AbstractEventLoop, Dict[HttpSettings, PooledTransport]] = (
+    weakref.WeakKeyDictionary()
+)
+_GUARD = threading.Lock()
+STATS = ConnectionStats()
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+def shared_transport(settings: HttpSettings) -> PooledTransport:
+    """Eén transport (en dus één pool) per settings, gedeeld door alle clients in deze loop."""
+    loop = asyncio.get_running_loop()
+    with _GUARD:
+        transports = _TRANSPORTS.setdefault(loop, {})
+        transport = transports.get(settings)
+        if transport is None:
+            http2 = settings.http2
+            if http2 and not _http2_available():
+                logging.warning("HTTP/2 gevraagd maar 'h2' is niet geïnstalleerd, HTTP/1.1 met keep-alive.")
+                http2 = False
+            transport = PooledTransport(
+                STATS,
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=settings.max_connections,
+                    max_keepalive_connections=settings.max_keepalive,
+                    keepalive_expiry=settings.keepalive_expiry,
+                ),
+            )
+            transports[settings] = transport
+        return transport
+
+
+def client_kwargs(settings: Optional[HttpSettings] = None) -> Dict[str, Any]:
+    """kwargs voor atproto's AsyncRequest (gaan door naar httpx.AsyncClient); binnen een event loop aanroepen."""
+    settings = settings or HttpSettings()
+    return {
+        "transport": shared_transport(settings),
+        "timeout": httpx.Timeout(
+            connect=settings.connect_timeout,
+            read=settings.read_timeout,
+            write=settings.write_timeout,
+            pool=settings.pool_timeout,
+        ),
+    }
+
+
+def log_connection_stats() -> None:
+    logging.info(
+        "HTTP: %d requests, %d nieuwe verbindingen (%d TLS handshakes), hergebruik %.0f%%",
+        STATS.requests, STATS.connects, STATS.tls_handshakes, STATS.reuse_ratio * 100,
+    )
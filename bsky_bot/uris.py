@@ -0,0 +1,52 @@
+from urllib.parse import urlparse
+
+
+def normalize_feed_uri(feed_uri_or_url: str) -> str:
+    """
+    Accepteert:
+    - at://.../app.bsky.feed.generator/<rkey>
+    - https://bsky.app/profile/<did-of-handle>/feed/<rkey>
+    Anders komt de invoer ongewijzigd terug (dan faalt de API call met een duidelijke error).
+    """
+    s = (feed_uri_or_url or "").strip()
+    if not s:
+        return ""
+
+    if s.startswith("at://"):
+        return s
+
+    # Voorbeeld: https://bsky.app/profile/did:plc:XXX/feed/YYY
+    marker = "/profile/"
+    if marker in s and "/feed/" in s:
+        try:
+            after_profile = s.split(marker, 1)[1]
+            actor_part, feed_part = after_profile.split("/feed/", 1)
+            actor = actor_part.strip("/").split("/", 1)[0]
+            rkey = feed_part.strip("/").split("/", 1)[0]
+            return f"at://{actor}/app.bsky.feed.generator/{rkey}"
+        except Exception:
+            pass
+
+    return s  # fallback
+
+
+def list_url_to_at_uri(list_url: str) -> str:
+    """
+    Zet bsky.app lijst-URL om naar at://... list URI dat de API verwacht.
+    Voorbeeld:
+    https://bsky.app/profile/did:plc:XXXX/lists/YYYY
+    -> at://did:plc:XXXX/app.bsky.graph.list/YYYY
+    Een at:// URI komt ongewijzigd terug.
+    """
+    if list_url.startswith("at://"):
+        return list_url
+
+    p = urlparse(list_url)
+    parts = [x for x in p.path.split("/") if x]
+    # verwacht: ["profile", "<did>", "lists", "<rkey>"]
+    if len(parts) < 4 or parts[0] != "profile" or parts[2] != "lists":
+        raise ValueError(f"Onverwachte LIST_URL vorm: {list_url}")
+
+    did = parts[1]
+    rkey = parts[3]
+    return f"at://{did}/app.bsky.graph.list/{rkey}"
@@ -0,0 +1,315 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+from atproto_core.uri import AtUri
+
+from bsky_bot.candidates import PostCandidate
+from bsky_bot.feed_cache import CachedFeed, viewer_states_for
+from bsky_bot.logs import log_event
+from bsky_bot.metrics import METRICS
+
+if TYPE_CHECKING:
+    from atproto_client import AsyncClient
+
+# applyWrites accepteert max 200 operaties per call
+MAX_OPS_PER_BATCH = 200
+
+REPOST_COLLECTION = "app.bsky.feed.repost"
+LIKE_COLLECTION = "app.bsky.feed.like"
+
+
+@dataclass
+class PostWrite:
+    """Alles wat er voor één post geschreven moet worden."""
+    post: PostCandidate
+    old_repost_uri: Optional[str]  # eerst verwijderen (None = er is geen oude repost)
+    like: bool                     # False = al geliked
+
+
+@dataclass
+class WriteResult:
+    """Uitkomst per operatie; None = niet nodig/niet geprobeerd."""
+    post: PostCandidate
+    unreposted: Optional[bool] = None
+    reposted: bool = False
+    liked: Optional[bool] = None
+    batched: bool = False
+
+
+def plan_write(post: PostCandidate, viewer_state=None) -> PostWrite:
+    """viewer_state: (repost_uri, like_uri) van dit account; None = uit post.viewer lezen."""
+    repost_uri, like_uri = viewer_state or post.viewer or (None, None)
+    return PostWrite(post=post, old_repost_uri=repost_uri, like=not like_uri)
+
+
+async def plan_writes(
+    client: "AsyncClient", label: str, picks: Sequence[Tuple[PostCandidate, CachedFeed]]
+) -> List[PostWrite]:
+    """
+    Gekozen posts -> wat dit account moet schrijven: viewer-state voor alle picks tegelijk
+    (één getPosts call per max 25), daarna plan_write. Posts zonder viewer-state vallen af.
+    """
+    with METRICS.phase("read"):
+        viewers = await viewer_states_for(client, label, list(picks))
+
+    writes: List[PostWrite] = []
+    for (post, _), viewer in zip(picks, viewers):
+        if isinstance(viewer, BaseException):
+            logging.warning("  Viewer-state ophalen mislukt, skip: %s", viewer)
+            continue
+        writes.append(plan_write(post, viewer))
+    return writes
+
+
+def merge_writes(writes: Sequence[PostWrite]) -> List[PostWrite]:
+    """
+    Dezelfde post twee keer in één batch -> één keer, op de laatste plek
+    (net als vroeger: de tweede repost "wint" en staat bovenaan).
+    """
+    merged: Dict[str, PostWrite] = {}
+    for w in writes:
+        prev = merged.pop(w.post.uri, None)
+        if prev is not None:
+            w = PostWrite(
+                post=w.post,
+                old_repost_uri=prev.old_repost_uri or w.old_repost_uri,
+                like=prev.like and w.like,
+            )
+        merged[w.post.uri] = w
+    return list(merged.values())
+
+
+def _ops_for(write: PostWrite, created_at: str) -> list:
+    from atproto_client import models  # pas laden als er echt geschreven wordt
+
+    subject = models.ComAtprotoRepoStrongRef.Main(uri=write.post.uri, cid=write.post.cid)
+    ops = []
+    if write.old_repost_uri:
+        ops.append(models.ComAtprotoRepoApplyWrites.Delete(
+            collection=REPOST_COLLECTION, rkey=AtUri.from_str(write.old_repost_uri).rkey,
+        ))
+    ops.append(models.ComAtprotoRepoApplyWrites.Create(
+        collection=REPOST_COLLECTION,
+        value=models.AppBskyFeedRepost.Record(subject=subject, created_at=created_at),
+    ))
+    if write.like:
+        ops.append(models.ComAtprotoRepoApplyWrites.Create(
+            collection=LIKE_COLLECTION,
+            value=models.AppBskyFeedLike.Record(subject=subject, created_at=created_at),
+        ))
+    return ops
+
+
+async def apply_writes_batch(client: "AsyncClient", writes: Sequence[PostWrite]) -> List[WriteResult]:
+    """
+    Alle deletes/creates van deze posts in één applyWrites call (atomisch: alles of niks).
+    createdAt loopt per post 1 ms op, zodat de volgorde van de reposts gelijk blijft.
+    Raise't als de PDS de batch weigert.
+    """
+    from atproto_client import models
+
+    now = client.get_current_time()
+    ops = []
+    for i, w in enumerate(writes):
+        ops.extend(_ops_for(w, (now + timedelta(milliseconds=i)).isoformat()))
+
+    if len(ops) > MAX_OPS_PER_BATCH:
+        raise ValueError(f"{len(ops)} operaties, max {MAX_OPS_PER_BATCH} per applyWrites")
+
+    resp = await client.com.atproto.repo.apply_writes(
+        models.ComAtprotoRepoApplyWrites.Data(repo=client.me.did, writes=ops)
+    )
+    n_results = len(resp.results or [])
+    if resp.results is not None and n_results != len(ops):
+        logging.warning("applyWrites gaf %d resultaten voor %d operaties.", n_results, len(ops))
+
+    # atomisch: geen exception = elke operatie gelukt
+    return [
+        WriteResult(
+            post=w.post,
+            unreposted=True if w.old_repost_uri else None,
+            reposted=True,
+            liked=True if w.like else None,
+            batched=True,
+        )
+        for w in writes
+    ]
+
+
+async def apply_writes_individually(client: "AsyncClient", write: PostWrite) -> WriteResult:
+    """De oude manier: delete_repost, repost en like als losse calls."""
+    result = WriteResult(post=write.post)
+
+    if write.old_repost_uri:
+        try:
+            await client.delete_repost(write.old_repost_uri)
+            result.unreposted = True
+        except Exception as e:
+            logging.warning("  Kon oude repost niet verwijderen: %s", e)
+            result.unreposted = False
+
+    try:
+        await client.repost(uri=write.post.uri, cid=write.post.cid)
+        result.reposted = True
+    except Exception as e:
+        logging.error("  Repost mislukt: %s", e)
+        return result
+
+    if write.like:
+        try:
+            await client.like(uri=write.post.uri, cid=write.post.cid)
+            result.liked = True
+        except Exception as e:
+            logging.warning("  Like mislukt: %s", e)
+            result.liked = False
+
+    return result
+
+
+def batch_rejected(e: Exception) -> bool:
+    """
+    True als applyWrites zeker niks geschreven heeft: de PDS weigerde de batch (400 /
+    InvalidRequest), of hij is niet eens verstuurd (te veel operaties). Bij een timeout,
+    netwerkfout, 5xx of 429 weten we dat niet (of is het budget op), dus dan geen losse calls.
+    """
+    from atproto_client.exceptions import BadRequestError, RateLimitExceededError
+
+    if isinstance(e, ValueError):
+        return True
+    if isinstance(e, RateLimitExceededError):
+        return False
+    if isinstance(e, BadRequestError):
+        return True
+    content = getattr(getattr(e, "response", None), "content", None)
+    return getattr(content, "error", None) == "InvalidRequest"
+
+
+async def write_posts(client: "AsyncClient", writes: Sequence[PostWrite], batch: bool = True) -> List[WriteResult]:
+    """
+    unrepost -> repost -> like voor alle posts, in volgorde.
+    batch=True: eerst één applyWrites per MAX_OPS_PER_BATCH; weigert de PDS die (zie
+    batch_rejected) dan alsnog per post met losse calls (applyWrites is atomisch, dus niks dubbel).
+    Bij een andere fout kan de batch al gecommit zijn: die posts tellen als mislukt, geen retry.
+    """
+    with METRICS.phase("write"):
+        results = await _write_posts(client, merge_writes(writes), batch)
+    count_writes(results)
+    return results
+
+
+async def _write_posts(client: "AsyncClient", writes: List[PostWrite], batch: bool) -> List[WriteResult]:
+    if not batch:
+        return [await apply_writes_individually(client, w) for w in writes]
+
+    chunks: List[List[PostWrite]] = []
+    chunk: List[PostWrite] = []
+    chunk_ops = 0
+    for w in writes:
+        n = 1 + (1 if w.old_repost_uri else 0) + (1 if w.like else 0)
+        if chunk and chunk_ops + n > MAX_OPS_PER_BATCH:
+            chunks.append(chunk)
+            chunk, chunk_ops = [], 0
+        chunk.append(w)
+        chunk_ops += n
+    if chunk:
+        chunks.append(chunk)
+
+    results: List[WriteResult] = []
+    for chunk in chunks:
+        try:
+            results.extend(await apply_writes_batch(client, chunk))
+        except Exception as e:
+            if not batch_rejected(e):
+                logging.error("  applyWrites mislukt (%r), %d posts niet opnieuw geprobeerd.", e, len(chunk))
+                results.extend(WriteResult(post=w.post) for w in chunk)
+                continue
+            logging.warning("  applyWrites geweigerd (%s), terug naar losse calls.", e)
+            results.extend([await apply_writes_individually(client, w) for w in chunk])
+    return results
+
+
+class WriteQueue:
+    """
+    Geordende write-queue per account: writes gaan de deur uit in de volgorde waarin ze
+    aangeboden zijn, ook als de reads ervoor in willekeurige volgorde klaar waren.
+
+    batch=True: verzamelen en bij close() in één keer via write_posts (applyWrites).
+    batch=False: een worker-taak schrijft elke post zodra hij in de queue staat,
+    terwijl de reads voor de volgende posts nog lopen.
+    """
+
+    def __init__(self, client: "AsyncClient", batch: bool = True) -> None:
+        self.client = client
+        self.batch = batch
+        self.results: List[WriteResult] = []
+        self._pending: List[PostWrite] = []
+        self._queue: "asyncio.Queue[Optional[PostWrite]]" = asyncio.Queue()
+        self._worker = None if batch else asyncio.ensure_future(self._run())
+
+    def submit(self, write: PostWrite) -> None:
+        if self.batch:
+            self._pending.append(write)
+        else:
+            self._queue.put_nowait(write)
+
+    async def _run(self) -> None:
+        while True:
+            write = await self._queue.get()
+            if write is None:
+                return
+            self.results.extend(await write_posts(self.client, [write], batch=False))
+
+    async def close(self) -> List[WriteResult]:
+        """Wacht tot alles geschreven is en geef de resultaten (in volgorde) terug."""
+        if self.batch:
+            self.results = await write_posts(self.client, self._pending, batch=True)
+            self._pending = []
+        else:
+            self._queue.put_nowait(None)
+            await self._worker
+        return self.results
+
+
+def log_write_result(result: WriteResult) -> None:
+    """Per operatie loggen, zelfde teksten als de losse calls."""
+    via = " (applyWrites)" if result.batched else ""
+    uri = result.post.uri
+    if result.unreposted:
+        log_event("unrepost", "  Oude repost verwijderd%s.", via, uri=uri, batched=result.batched)
+    if result.reposted:
+        log_event("repost", "  Repost gelukt%s: %s", via, uri, uri=uri, batched=result.batched)
+    if result.liked:
+        log_event("like", "  Like gelukt%s.", via, uri=uri, batched=result.batched)
+
+
+def summarize(results: Sequence[WriteResult]) -> Tuple[int, int, int]:
+    """(reposts, likes, waarvan via applyWrites)"""
+    return (
+        sum(1 for r in results if r.reposted),
+        sum(1 for r in results if r.liked),
+        sum(1 for r in results if r.batched),
+    )
+
+
+def count_writes(results: Sequence[WriteResult]) -> None:
+    """Uitkomsten optellen in de run-metrics van het huidige account."""
+    for r in results:
+        METRICS.incr("reposts" if r.reposted else "repost_failures")
+        if r.liked is not None:
+            METRICS.incr("likes" if r.liked else "like_failures")
+        if r.unreposted is not None:
+            METRICS.incr("unreposts" if r.unreposted else "unrepost_failures")
+
+
+def log_account_writes(label: str, results: Sequence[WriteResult]) -> None:
+    """Alle resultaten van één account loggen + een samenvattende regel."""
+    for r in results:
+        log_write_result(r)
+    reposts, likes, batched = summarize(results)
+    logging.info(
+        "Account %s: %d/%d reposts, %d likes (%d via applyWrites)",
+        label, reposts, len(results), likes, batched,
+    )
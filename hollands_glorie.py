@@ -1,29 +1,58 @@
-import os
-import time
 import random
 import logging
-from typing import List, Optional
-
-from atproto import Client
+from typing import Callable, List, Optional
+
+from bsky_bot.candidates import (
+    EXTERNAL_THUMB,
+    IMAGES,
+    MEDIA_IMAGES,
+    RECORD,
+    VIDEO,
+    PostCandidate,
+    has_media,
+    is_quote_post,
+)
+from bsky_bot.feed_cache import FeedCache
+from bsky_bot.logs import log_event, setup_logging
+from bsky_bot.pipeline import SourceJob
+from bsky_bot.runner import run_main
+from bsky_bot.sources import FetchSettings, Source, TargetSource, feed_sources, target_sources
 
 # --------------------------------------------------
 # Config
 # --------------------------------------------------
 AUTHOR_FEED_LIMIT = 100          # max is 100 (atproto validatie)
+AUTHOR_FEED_INCREMENTAL = True   # alleen nieuwe items sinds vorige run ophalen (state in .bsky_state)
+AUTHOR_FEED_FIRST_PAGE = 10      # eerste (kleine) pagina bij incrementeel ophalen
+AUTHOR_FEED_POOL = 30            # random uit de laatste zoveel geldige posts; verder pagineren is niet nodig
 FEED_LIMIT = 100                # max is 100
-DELAY_SECONDS = 1               # door jou gevraagd
+# Rate limits en HTTP pool gelden voor alle jobs: zie RATE_LIMITS / HTTP_SETTINGS in bsky_bot/accounts.py
 RANDOM_PER_SOURCE = 1           # 1 random post per target/feed
+ACCOUNT_WORKERS = 3             # accounts parallel (1 = één voor één)
+BATCH_WRITES = True             # unrepost+repost+like van een account in één applyWrites call
+FEED_CACHE_TTL_SECONDS = 0      # 0 = feeds alleen binnen deze run delen, >0 = ook op schijf tussen runs
+
+# Wat telt als media: images/video/external thumb (ook embed.media.images bij recordWithMedia)
+MEDIA_FLAGS = IMAGES | MEDIA_IMAGES | EXTERNAL_THUMB | VIDEO
+# Quote posts (embed.record) skippen we
+QUOTE_FLAGS = RECORD
 
 # Optioneel: als je een account hebt waarbij eigen reposts wél mogen (zoals bleuskybeauty)
 ALLOW_SELF_REPOSTS_FOR = {"bleuskybeauty.bsky.social"}
 
+FETCH = FetchSettings(
+    namespace="hollands_glorie",
+    author_feed_limit=AUTHOR_FEED_LIMIT,
+    author_feed_first_page=AUTHOR_FEED_FIRST_PAGE,
+    author_feed_incremental=AUTHOR_FEED_INCREMENTAL,
+    want=AUTHOR_FEED_POOL,
+    feed_limit=FEED_LIMIT,
+)
+
 # --------------------------------------------------
 # Logging
 # --------------------------------------------------
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-)
+setup_logging()
 
 # --------------------------------------------------
 # Bot-accounts (env suffixen)
@@ -77,150 +106,47 @@ FEED_URIS: List[str] = [
     FEED_URI_1,
 ]
 
+# Eerst feeds (3 -> 1), dan targets (10 -> 1); lege worden overgeslagen
+SOURCES: List[Source] = [*feed_sources(FEED_URIS), *target_sources(TARGET_HANDLES)]
+
+# Kandidaten per target/feed worden één keer opgehaald en door alle accounts gedeeld
+FEED_CACHE = FeedCache("hollands_glorie", ttl_seconds=FEED_CACHE_TTL_SECONDS)
+
 # --------------------------------------------------
 # Helpers
 # --------------------------------------------------
-def get_client_for_account(label: str) -> Optional[Client]:
-    username = os.getenv(f"BSKY_USERNAME_{label}")
-    password = os.getenv(f"BSKY_PASSWORD_{label}")
-
-    if not username or not password:
-        logging.warning("Geen credentials gevonden voor %s, skip.", label)
-        return None
-
-    client = Client()
-    try:
-        client.login(username, password)
-        logging.info("Ingelogd als %s (label=%s)", username, label)
-        return client
-    except Exception as e:
-        logging.error("Login mislukt voor %s: %s", label, e)
-        return None
-
+def is_repost_item(post: PostCandidate) -> bool:
+    return post.is_repost
 
-def normalize_feed_uri(feed_uri_or_url: str) -> str:
-    """
-    Accepteert:
-    - at://.../app.bsky.feed.generator/<rkey>
-    - https://bsky.app/profile/<did-of-handle>/feed/<rkey>
-    """
-    s = (feed_uri_or_url or "").strip()
-    if not s:
-        return ""
-
-    if s.startswith("at://"):
-        return s
-
-    # Probeer bsky.app link te parsen
-    # Voorbeeld: https://bsky.app/profile/did:plc:XXX/feed/YYY
-    marker = "/profile/"
-    if marker in s and "/feed/" in s:
-        try:
-            after_profile = s.split(marker, 1)[1]
-            actor_part, feed_part = after_profile.split("/feed/", 1)
-            actor = actor_part.strip("/")
-            rkey = feed_part.strip("/").split("/", 1)[0]
-            return f"at://{actor}/app.bsky.feed.generator/{rkey}"
-        except Exception:
-            pass
-
-    return s  # fallback
-
-
-def fetch_author_feed(client: Client, actor_handle: str):
-    feed = client.get_author_feed(
-        actor=actor_handle,
-        limit=AUTHOR_FEED_LIMIT,
-        filter="posts_no_replies",
-    )
-    return list(feed.feed or [])
-
-
-def fetch_generator_feed(client: Client, feed_uri_or_url: str):
-    feed_uri = normalize_feed_uri(feed_uri_or_url)
-    if not feed_uri:
-        return []
-
-    # Gebruik de low-level app call (werkt stabiel bij feeds)
-    res = client.app.bsky.feed.get_feed({"feed": feed_uri, "limit": FEED_LIMIT})
-    return list(getattr(res, "feed", []) or [])
-
-
-def is_repost_item(feed_item) -> bool:
-    return getattr(feed_item, "reason", None) is not None
 
-
-def has_media(post_view) -> bool:
-    """
-    True als er images/video/external thumb is.
-    We checken vooral op 'embed' aanwezigheid met media-velden.
-    """
-    embed = getattr(post_view, "embed", None)
-    if not embed:
-        return False
-
-    # Veel voorkomende: embed.images
-    images = getattr(embed, "images", None)
-    if isinstance(images, list) and images:
-        return True
-
-    # Soms: embed.media.images (recordWithMedia)
-    media = getattr(embed, "media", None)
-    if media:
-        media_images = getattr(media, "images", None)
-        if isinstance(media_images, list) and media_images:
-            return True
-
-    # External met thumb (link preview)
-    external = getattr(embed, "external", None)
-    if external and getattr(external, "thumb", None):
-        return True
-
-    # Video embed kan per lib-versie anders heten; als er iets als "playlist" of "cid" zit:
-    if getattr(embed, "playlist", None) or getattr(embed, "cid", None):
-        return True
-
-    return False
-
-
-def is_quote_post(post_view) -> bool:
-    """
-    Quote posts hebben meestal embed.record of embed.record + media.
-    We skippen alles waar embed een 'record' (quoted record) bevat.
-    """
-    embed = getattr(post_view, "embed", None)
-    if not embed:
-        return False
-    if getattr(embed, "record", None) is not None:
-        return True
-    return False
-
-
-def is_valid_post(feed_item, source_handle: Optional[str] = None) -> bool:
+def is_valid_post(post: PostCandidate, source_handle: Optional[str] = None) -> bool:
     """
     Regels:
     - moet media hebben
     - geen quote-post
     - geen repost-items (tenzij allow-self-reposts en post.author == source_handle)
     """
-    post_view = feed_item.post
-
-    if not has_media(post_view):
+    if not has_media(post, MEDIA_FLAGS):
         return False
 
-    if is_quote_post(post_view):
+    if is_quote_post(post, QUOTE_FLAGS):
         return False
 
-    if is_repost_item(feed_item):
+    if is_repost_item(post):
         if source_handle and source_handle.lower() in ALLOW_SELF_REPOSTS_FOR:
-            author = getattr(post_view, "author", None)
-            if author and getattr(author, "handle", "").lower() == source_handle.lower():
+            if post.author_handle.lower() == source_handle.lower():
                 return True
         return False
 
     return True
 
 
+def is_valid_for(source: Source) -> Callable[[PostCandidate], bool]:
+    # eigen reposts mogen alleen bij targets (zie ALLOW_SELF_REPOSTS_FOR)
+    source_handle = source.actor if isinstance(source, TargetSource) else None
+    return lambda post: is_valid_post(post, source_handle=source_handle)
+
+
 def pick_random_posts(valid_items: List, k: int) -> List:
     if not valid_items or k <= 0:
         return []
@@ -228,97 +154,33 @@ def pick_random_posts(valid_items: List, k: int) -> List:
     return random.sample(valid_items, k=k)
 
 
-def unrepost_like_and_repost(client: Client, feed_item) -> None:
-    post = feed_item.post
-    viewer = getattr(post, "viewer", None)
-
-    repost_uri = getattr(viewer, "repost", None) if viewer else None
-    like_uri = getattr(viewer, "like", None) if viewer else None
-
-    # Eerst oude repost verwijderen (als die bestaat)
-    if repost_uri:
-        try:
-            client.delete_repost(repost_uri)
-            logging.info("  Oude repost verwijderd.")
-        except Exception as e:
-            logging.warning("  Kon oude repost niet verwijderen: %s", e)
-
-    # Repost opnieuw
-    try:
-        client.repost(uri=post.uri, cid=post.cid)
-        logging.info("  Repost gelukt.")
-    except Exception as e:
-        logging.error("  Repost mislukt: %s", e)
-        return
-
-    # Like (alleen als nog niet geliked)
-    if not like_uri:
-        try:
-            client.like(uri=post.uri, cid=post.cid)
-            logging.info("  Like gelukt.")
-        except Exception as e:
-            logging.warning("  Like mislukt: %s", e)
-
-
-def process_account(label: str) -> None:
-    logging.info("=== Start account %s ===", label)
-    client = get_client_for_account(label)
-    if not client:
-        return
-
-    # 1) Eerst FEEDS (3 -> 1)
-    for feed_uri in FEED_URIS:
-        if not feed_uri.strip():
-            continue
-
-        logging.info("=== Account %s: feed %s ===", label, feed_uri)
-        try:
-            items = fetch_generator_feed(client, feed_uri)
-        except Exception as e:
-            logging.error("Feed ophalen mislukt: %s", e)
-            continue
-
-        valid = [it for it in items if is_valid_post(it, source_handle=None)]
-        if not valid:
-            logging.info("Geen geldige media-posts in feed, skip.")
-            continue
-
-        chosen = pick_random_posts(valid, RANDOM_PER_SOURCE)
-        for it in chosen:
-            logging.info("  -> Repost+Like (random uit feed)")
-            unrepost_like_and_repost(client, it)
-            time.sleep(DELAY_SECONDS)
-
-    # 2) Dan TARGET HANDLES (10 -> 1, zodat 1 als laatste komt)
-    for target_handle in TARGET_HANDLES:
-        if not target_handle.strip():
-            continue
-
-        logging.info("=== Account %s: target %s ===", label, target_handle)
-        try:
-            items = fetch_author_feed(client, target_handle)
-        except Exception as e:
-            logging.error("Author feed ophalen mislukt: %s", e)
-            continue
-
-        valid = [it for it in items if is_valid_post(it, source_handle=target_handle)]
-        if not valid:
-            logging.info("Geen geldige media-posts voor %s, skip.", target_handle)
-            continue
-
-        chosen = pick_random_posts(valid, RANDOM_PER_SOURCE)
-        for it in chosen:
-            logging.info("  -> Repost+Like (random uit target)")
-            unrepost_like_and_repost(client, it)
-            time.sleep(DELAY_SECONDS)
+def pick_source_posts(items: List[PostCandidate], source: str) -> List[PostCandidate]:
+    """Random post(s) uit één bron; de viewer-state volgt voor alle bronnen samen (zie SourceJob)."""
+    picks = pick_random_posts(items, RANDOM_PER_SOURCE)
+    for it in picks:
+        log_event("pick", "  -> Repost+Like (random uit %s)", source, source=source, uri=it.uri)
+    return picks
 
 
-def main():
+JOB = SourceJob(
+    sources=SOURCES,
+    fetch=FETCH,
+    cache=FEED_CACHE,
+    is_valid_for=is_valid_for,
+    pick=pick_source_posts,
+    batch_writes=BATCH_WRITES,
+)
+
+
+async def main_async():
     logging.info("=== Start Hollands Glorie multi-target+feed run ===")
-    for label in ACCOUNT_KEYS:
-        process_account(label)
+    await JOB.run(ACCOUNT_KEYS, workers=ACCOUNT_WORKERS)
     logging.info("=== Hollands Glorie run voltooid ===")
 
 
+def main():
+    run_main(main_async)
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
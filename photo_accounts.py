@@ -1,11 +1,33 @@
-import os
-import time
 import random
+import asyncio
 import logging
-from typing import List, Optional, Iterable, Set
-from urllib.parse import urlparse
-
-from atproto import Client
+from contextlib import aclosing
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+from bsky_bot.accounts import get_client_for_account
+from bsky_bot.candidates import (
+    EXTERNAL_THUMB,
+    IMAGES,
+    MEDIA_IMAGES,
+    MEDIA_RECORD,
+    RECORD,
+    PostCandidate,
+    has_media,
+    is_quote_post,
+)
+from bsky_bot.feed_cache import GET_POSTS_BATCH, CachedFeed, FeedCache
+from bsky_bot.prefetch import prefetch, ready_batches
+from bsky_bot.logs import setup_logging
+from bsky_bot.metrics import METRICS
+from bsky_bot.resolver import resolve_sources
+from bsky_bot.runner import run_accounts, run_main
+from bsky_bot.sources import FetchSettings, Source, TargetSource, fetch_candidates, list_source
+from bsky_bot.state import load_json, save_json
+from bsky_bot.stream import SharedIterator, rotate, shuffle_buffer
+from bsky_bot.writes import plan_writes, write_posts
+
+if TYPE_CHECKING:
+    from atproto_client import AsyncClient
 
 # ----------------------------
 # CONFIG
@@ -22,266 +44,274 @@ PICK_FROM_LAST_N = 5
 # Hoeveel author feed items we ophalen om die laatste N eigen+media posts te vinden
 AUTHOR_FEED_LIMIT = 50  # veilig; we filteren daarna terug naar laatste 5 geschikte
 
-# kleine delay (jij wilde 1 seconde)
-DELAY_SECONDS = 1
+# Alleen nieuwe items sinds de vorige run ophalen (state in .bsky_state), eerst een kleine pagina
+AUTHOR_FEED_INCREMENTAL = True
+AUTHOR_FEED_FIRST_PAGE = 10
+
+# Hoeveel author feeds we tegelijk vooruit ophalen terwijl er gerepost wordt (per bot-account)
+AUTHOR_FEED_PREFETCH = 8
+
+# Member lijst wordt bewaard in .bsky_state en alleen opnieuw gepagineerd als hij ouder is dan
+# LIST_REFRESH_SECONDS of als de eerste LIST_PROBE_LIMIT members (goedkope probe) veranderd zijn
+LIST_REFRESH_SECONDS = 6 * 3600
+LIST_PROBE_LIMIT = 10
+
+# Grootte van de shuffle buffer over de (gestreamde) member lijst: groter = willekeuriger,
+# kleiner = eerder beginnen en minder geheugen
+SHUFFLE_BUFFER = 100  # = één get_list pagina
+
+# Elk account begint in de lijst waar het de vorige run ophield (offset per account in
+# .bsky_state), zodat bij een grote lijst iedereen aan de beurt komt en niet alleen de kop
+ROTATION_FILE = "photo_accounts/rotation.json"
+
+# Author feeds worden per run één keer opgehaald en gedeeld door alle bot-accounts.
+# 0 = alleen binnen deze run, >0 = ook op schijf bewaren (seconden)
+FEED_CACHE_TTL_SECONDS = 0
+
+# Rate limiting per account (token buckets) en de HTTP pool gelden voor alle jobs:
+# zie RATE_LIMITS / HTTP_SETTINGS in bsky_bot/accounts.py
 
 # Bot accounts (secrets suffixen)
 ACCOUNT_KEYS = ["BEAUTYFAN", "HOTBLEUSKY", "DMPHOTOS"]
 
+# Hoeveel bot-accounts tegelijk draaien (1 = één voor één, zoals vroeger).
+# Elk account houdt z'n eigen volgorde en eigen rate limits.
+ACCOUNT_WORKERS = 3
+
+# unrepost+repost+like per post in één applyWrites call i.p.v. drie losse calls
+BATCH_WRITES = True
+
+# Wat telt als media: images / media.images / external.thumb
+MEDIA_FLAGS = IMAGES | MEDIA_IMAGES | EXTERNAL_THUMB
+# Quote posts hebben een embed.record, soms onder embed.media
+QUOTE_FLAGS = RECORD | MEDIA_RECORD
+
+FETCH = FetchSettings(
+    namespace="photo_accounts",
+    author_feed_limit=AUTHOR_FEED_LIMIT,
+    author_feed_first_page=AUTHOR_FEED_FIRST_PAGE,
+    author_feed_incremental=AUTHOR_FEED_INCREMENTAL,
+    want=PICK_FROM_LAST_N,
+)
+
+# De lijst is de enige bron; een ongeldige LIST_URL faalt hier al (ook bij --dry-run)
+LIST_SOURCE = list_source(LIST_URL)
+SOURCES: List[Source] = [LIST_SOURCE]
+
 # ----------------------------
 # LOGGING
 # ----------------------------
-logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+setup_logging()
 
+FEED_CACHE = FeedCache("photo_accounts", ttl_seconds=FEED_CACHE_TTL_SECONDS)
 
-# ----------------------------
-# LIST URI helpers
-# ----------------------------
-def list_url_to_at_uri(list_url: str) -> str:
+
+class CandidatePool:
     """
-    Zet bsky.app lijst-URL om naar at://... list URI dat de API verwacht.
-    Voorbeeld:
-    https://bsky.app/profile/did:plc:XXXX/lists/YYYY
-    -> at://did:plc:XXXX/app.bsky.graph.list/YYYY
+    Run-brede pool per member: de laatste n geldige posts, één keer bepaald (feed via FEED_CACHE).
+    Elk bot-account trekt er zonder teruglegging uit, dus in een volgende ronde nooit dezelfde
+    post opnieuw (geen unrepost+repost van wat net gerepost is). Members waarvan de feed niet
+    op te halen was worden deze run niet opnieuw geprobeerd.
     """
-    p = urlparse(list_url)
-    parts = [x for x in p.path.split("/") if x]
-    # verwacht: ["profile", "<did>", "lists", "<rkey>"]
-    if len(parts) < 4 or parts[0] != "profile" or parts[2] != "lists":
-        raise ValueError(f"Onverwachte LIST_URL vorm: {list_url}")
 
-    did = parts[1]
-    rkey = parts[3]
-    return f"at://{did}/app.bsky.graph.list/{rkey}"
+    def __init__(self, n: int) -> None:
+        self.n = n
+        self._remaining: Dict[Tuple[str, str], List[PostCandidate]] = {}  # (label, actor)
+        self._failed: Set[str] = set()
+        self._drawn: Set[Tuple[str, str]] = set()  # (label, actor) die een kans kregen
+
+    def exhausted(self, label: str, actor: str) -> bool:
+        remaining = self._remaining.get((label, actor))
+        return actor in self._failed or (remaining is not None and not remaining)
+
+    async def draw(self, client: "AsyncClient", label: str, actor: str) -> Optional[Tuple[PostCandidate, CachedFeed]]:
+        """Volgende random kandidaat van deze member voor dit account, met de cache entry erbij."""
+        self._drawn.add((label, actor))
+        if actor in self._failed:
+            return None
+        try:
+            source = TargetSource(actor)
+            entry = await FEED_CACHE.get(
+                source.key,
+                label,
+                lambda: fetch_candidates(client, source, FETCH, is_valid_candidate),
+            )
+        except Exception:
+            self._failed.add(actor)
+            return None
 
+        remaining = self._remaining.get((label, actor))
+        if remaining is None:
+            remaining = entry.items[: max(1, self.n)]
+            random.shuffle(remaining)
+            self._remaining[(label, actor)] = remaining
+        if not remaining:
+            return None
+        return remaining.pop(), entry
 
-def iter_list_members(client: Client, list_uri: str, page_limit: int = 100) -> Iterable[str]:
-    """
-    Yield member handles uit een Bluesky lijst (paginated).
-    We geven handles terug (string).
-    """
-    cursor = None
-    while True:
-        resp = client.app.bsky.graph.get_list({"list": list_uri, "limit": page_limit, "cursor": cursor})
-        items = getattr(resp, "items", []) or []
-        for it in items:
-            subj = getattr(it, "subject", None)
-            if subj and getattr(subj, "handle", None):
-                yield subj.handle
-
-        cursor = getattr(resp, "cursor", None)
-        if not cursor:
-            break
+    def drawn(self, label: str) -> int:
+        """Aantal members waar dit account deze run een kans aan gaf."""
+        return sum(1 for lbl, _ in self._drawn if lbl == label)
 
 
-# ----------------------------
-# Post filters
-# ----------------------------
-def has_media(post_view) -> bool:
+MEMBER_POOL = CandidatePool(PICK_FROM_LAST_N)
+
+
+class MemberRotation:
     """
-    True als er embed media is (images / media.images / external.thumb).
+    Startpositie in de member lijst per bot-account, bewaard tussen runs.
+    Na een run schuift de start op met het aantal members dat een kans kreeg.
+    Pas bij het eerste gebruik van schijf gelezen (importeren raakt STATE_DIR niet, bv. bij --dry-run).
     """
-    embed = getattr(post_view, "embed", None)
-    if not embed:
-        return False
 
-    images = getattr(embed, "images", None)
-    if isinstance(images, list) and images:
-        return True
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._offsets: Optional[Dict[str, int]] = None
 
-    media = getattr(embed, "media", None)
-    if media:
-        media_images = getattr(media, "images", None)
-        if isinstance(media_images, list) and media_images:
-            return True
+    def _load(self) -> Dict[str, int]:
+        if self._offsets is None:
+            self._offsets = load_json(self.path, default={}) or {}
+        return self._offsets
 
-    external = getattr(embed, "external", None)
-    if external and getattr(external, "thumb", None):
-        return True
+    def start(self, label: str) -> int:
+        return int(self._load().get(label, 0))
 
-    return False
+    def advance(self, label: str, n: int, list_size: Optional[int]) -> None:
+        """list_size None = lijst niet helemaal gelezen (rotate() doet dan later de modulo)."""
+        offset = self.start(label) + n
+        self._load()[label] = offset % list_size if list_size else offset
 
+    def save(self) -> None:
+        if self._offsets is None:
+            return
+        try:
+            save_json(self.path, self._offsets)
+        except Exception as e:
+            logging.warning("Lijst rotatie opslaan mislukt: %s", e)
 
-def is_quote_post(post_view) -> bool:
-    """
-    Quote posts hebben meestal een embed.record / embed.record.record / embed.record.uri structuur.
-    We checken breed zodat het blijft werken bij modelverschillen.
-    """
-    embed = getattr(post_view, "embed", None)
-    if not embed:
-        return False
-    record = getattr(embed, "record", None)
-    if record:
-        return True
-    # soms zit het onder embed.media of andere subtypes; voorzichtig:
-    maybe_record = getattr(getattr(embed, "media", None), "record", None)
-    return bool(maybe_record)
+
+ROTATION = MemberRotation(ROTATION_FILE)
 
 
-def is_original_post(feed_item) -> bool:
+# ----------------------------
+# Post filters
+# ----------------------------
+def is_original_post(post: PostCandidate) -> bool:
     """
     True als item géén repost is in author feed.
     In get_author_feed zie je reposts via item.reason != None.
     """
-    return getattr(feed_item, "reason", None) is None
+    return not post.is_repost
 
 
-def is_valid_candidate(feed_item) -> bool:
+def is_valid_candidate(post: PostCandidate) -> bool:
     """
     Kandidaten:
     - original (geen repost)
     - heeft media (geen text-only)
     - geen quote post
     """
-    post_view = feed_item.post
-    if not is_original_post(feed_item):
+    if not is_original_post(post):
         return False
-    if not has_media(post_view):
+    if not has_media(post, MEDIA_FLAGS):
         return False
-    if is_quote_post(post_view):
+    if is_quote_post(post, QUOTE_FLAGS):
         return False
     return True
 
 
-# ----------------------------
-# Client / auth
-# ----------------------------
-def get_client_for_account(label: str) -> Optional[Client]:
-    username = os.getenv(f"BSKY_USERNAME_{label}")
-    password = os.getenv(f"BSKY_PASSWORD_{label}")
-
-    if not username or not password:
-        logging.warning("Geen credentials voor %s, skip.", label)
-        return None
-
-    client = Client()
-    try:
-        client.login(username, password)
-        logging.info("Ingelogd (label=%s)", label)
-        return client
-    except Exception as e:
-        logging.error("Login mislukt %s: %s", label, e)
-        return None
-
-
-def fetch_author_feed(client: Client, handle: str):
-    return client.get_author_feed(
-        actor=handle,
-        limit=AUTHOR_FEED_LIMIT,
-        filter="posts_no_replies",
-    ).feed or []
-
-
-def pick_random_from_last_n_valid(client: Client, handle: str, n: int) -> Optional[object]:
+async def prefetch_member(client: "AsyncClient", label: str, actor: str) -> Optional[Tuple[PostCandidate, CachedFeed]]:
     """
-    Haal author feed en pak random uit de laatste n geldige posts.
+    Read-kant voor één member (draait als prefetch taak): kandidaat kiezen.
+    Geeft (kandidaat, cache entry) of None; de viewer-state volgt per batch in repost_batch.
     """
-    try:
-        feed = fetch_author_feed(client, handle)
-    except Exception:
-        return None
-
-    valid = [it for it in feed if is_valid_candidate(it)]
-    if not valid:
-        return None
-
-    pool = valid[: max(1, min(n, len(valid)))]
-    return random.choice(pool)
+    with METRICS.phase("read"):
+        return await MEMBER_POOL.draw(client, label, actor)
 
 
-def unrepost_if_needed(client: Client, post_view) -> None:
-    viewer = getattr(post_view, "viewer", None)
-    repost_uri = getattr(viewer, "repost", None) if viewer else None
-    if repost_uri:
-        try:
-            client.delete_repost(repost_uri)
-        except Exception:
-            pass
-
-
-def repost_and_like(client: Client, post_view) -> bool:
+async def repost_batch(client: "AsyncClient", label: str, picks: List[Tuple[PostCandidate, CachedFeed]]) -> int:
     """
-    Repost + like (like alleen als nog niet geliked)
+    Viewer-state van dit account voor alle gekozen posts tegelijk (samen één getPosts call,
+    max GET_POSTS_BATCH), daarna per post unrepost -> repost -> like.
+    BATCH_WRITES: elke post in één applyWrites call, bij weigering alsnog met losse calls.
+    Geeft het aantal reposts.
     """
-    try:
-        client.repost(uri=post_view.uri, cid=post_view.cid)
-    except Exception:
-        return False
+    reposted = 0
+    for write in await plan_writes(client, label, picks):
+        [result] = await write_posts(client, [write], batch=BATCH_WRITES)
+        reposted += result.reposted
+    return reposted
 
-    viewer = getattr(post_view, "viewer", None)
-    like_uri = getattr(viewer, "like", None) if viewer else None
-    if not like_uri:
-        try:
-            client.like(uri=post_view.uri, cid=post_view.cid)
-        except Exception:
-            pass
-
-    return True
 
-
-def process_account(label: str, list_uri: str, members: List[str]) -> None:
-    client = get_client_for_account(label)
+async def process_account(label: str, members: SharedIterator) -> None:
+    """
+    Streaming pipeline per bot-account:
+    members (lazy, gedeeld, vanaf de rotatie-offset van dit account) -> shuffle buffer
+    -> prefetch (feed + filter + kies) -> repost/like.
+    De eerste repost kan al na de eerste get_list pagina; er wordt nooit de hele lijst
+    vooraf opgehaald of gekopieerd.
+    """
+    client = await get_client_for_account(label)
     if not client:
         return
 
-    # Shuffle voor randomness, maar “iedereen kans” via round-robin
-    members_shuffled = members[:]
-    random.shuffle(members_shuffled)
-
     reposted_count = 0
-    tried_pairs: Set[str] = set()
+    round_no = 0
+    start = ROTATION.start(label)
 
-    # Round-robin: 1 per member per ronde, tot 25
+    # Round-robin: 1 per member per ronde, tot MAX_REPOSTS_PER_RUN
     while reposted_count < MAX_REPOSTS_PER_RUN:
+        # per run max 1 poging per member per ronde; maar we kunnen meerdere rondes doen
+        # om aan MAX_REPOSTS_PER_RUN te komen als lijst klein is.
+        if round_no > 0 and len(members) >= MAX_REPOSTS_PER_RUN:
+            # bij grote lijst: 1 kans is genoeg
+            break
+        round_no += 1
         progressed_this_round = False
 
-        for handle in members_shuffled:
-            if reposted_count >= MAX_REPOSTS_PER_RUN:
-                break
-
-            key = f"{handle}"
-            # per run max 1 poging per member per ronde; maar we kunnen meerdere rondes doen
-            # om aan 25 te komen als lijst klein is.
-            if key in tried_pairs and len(members_shuffled) >= MAX_REPOSTS_PER_RUN:
-                # bij grote lijst: 1 kans is genoeg
-                continue
-
-            tried_pairs.add(key)
-
-            item = pick_random_from_last_n_valid(client, handle, PICK_FROM_LAST_N)
-            if not item:
-                continue
-
-            post_view = item.post
-
-            # unrepost -> repost -> like
-            unrepost_if_needed(client, post_view)
-            ok = repost_and_like(client, post_view)
-            if ok:
-                reposted_count += 1
-                progressed_this_round = True
-
-            time.sleep(DELAY_SECONDS)
+        # Randomness uit een begrensde shuffle buffer i.p.v. de hele lijst te shufflen.
+        # Reads (feed + kiezen) lopen vooruit in de prefetch; de write-loop hieronder pakt
+        # alle kandidaten die al klaar zijn (max GET_POSTS_BATCH, viewer-state in één call)
+        # en wacht nooit op een volle batch: de eerste write gaat zodra er één kandidaat is,
+        # wat er tijdens de writes binnenkomt gaat mee in de volgende batch.
+        # Members waarvan dit account alle kandidaten al gehad heeft kosten geen reads meer
+        remaining = (m async for m in rotate(members, start) if not MEMBER_POOL.exhausted(label, m.did))
+        ready = prefetch(
+            shuffle_buffer(remaining, SHUFFLE_BUFFER),
+            lambda member: prefetch_member(client, label, member.did),
+            AUTHOR_FEED_PREFETCH,
+        )
+        batches = ready_batches((picked async for _, picked in ready if picked), GET_POSTS_BATCH)
+        async with aclosing(ready), aclosing(batches):
+            async for picks in batches:
+                done = await repost_batch(client, label, picks[: MAX_REPOSTS_PER_RUN - reposted_count])
+                reposted_count += done
+                progressed_this_round = progressed_this_round or done > 0
+                if reposted_count >= MAX_REPOSTS_PER_RUN:
+                    break
 
         if not progressed_this_round:
             # Niemand leverde nog een geldige post op -> stop
             break
 
-    logging.info("Account %s klaar: %d reposts.", label, reposted_count)
+    tried = MEMBER_POOL.drawn(label)
+    ROTATION.advance(label, tried, len(members) if members.exhausted else None)
+    logging.info(
+        "Account %s klaar: %d reposts, %d members geprobeerd vanaf positie %d.", label, reposted_count, tried, start
+    )
 
 
-def main():
-    list_uri = list_url_to_at_uri(LIST_URL)
+async def main_async():
     logging.info("=== Photo Accounts run ===")
-    logging.info("List URI: %s", list_uri)
+    logging.info("List URI: %s", LIST_SOURCE.uri)
 
-    # We halen members één keer op en hergebruiken voor alle bot-accounts
-    # (scheelt calls en is sneller/goedkoper)
+    # We pagineren de members één keer en delen ze met alle bot-accounts
+    # (scheelt calls en is sneller/goedkoper). Lazy: accounts beginnen al na de eerste pagina.
     # Hiervoor gebruiken we een tijdelijke client: eerste account die werkt, of we maken een anonieme login nodig?
     # Bluesky list lezen kan login vereisen -> we gebruiken gewoon de eerste account die werkt.
     tmp_client = None
     for label in ACCOUNT_KEYS:
-        tmp_client = get_client_for_account(label)
+        tmp_client = await get_client_for_account(label)
         if tmp_client:
             break
 
@@ -289,20 +319,38 @@ def main():
         logging.error("Geen enkele bot-account kon inloggen, stop.")
         return
 
-    members = list(dict.fromkeys(iter_list_members(tmp_client, list_uri)))  # unique, behoud volgorde
-    logging.info("Lijst members gevonden: %d", len(members))
+    # lijst-URL met een handle i.p.v. DID -> één keer resolven
+    [source] = await resolve_sources(tmp_client, [LIST_SOURCE])
+    members = SharedIterator(source.members(tmp_client, LIST_REFRESH_SECONDS, LIST_PROBE_LIMIT, raw_json=FETCH.raw_json))
 
-    if not members:
+    async with aclosing(aiter(members)) as head:
+        empty = await anext(head, None) is None
+    if empty:
         logging.warning("Geen members in lijst, stop.")
         return
 
+    # De rest van de lijst op de achtergrond uitlezen: de accounts stoppen bij MAX_REPOSTS_PER_RUN,
+    # maar de lijst-cache wordt pas geschreven als de hele lijst binnen is
+    filling = asyncio.create_task(members.fill())
+
     # Nu runnen we voor elk bot-account.
     # (We loggen niet alle handles voor privacy; alleen aantallen.)
-    for label in ACCOUNT_KEYS:
-        process_account(label, list_uri, members)
+    await run_accounts(ACCOUNT_KEYS, lambda label: process_account(label, members), workers=ACCOUNT_WORKERS)
+    await filling
+    ROTATION.save()
+    if members.exhausted:
+        logging.info("Lijst members: %d", len(members))
+    else:
+        logging.info("Lijst members gelezen: %d (lijst niet helemaal doorlopen)", len(members))
+    FEED_CACHE.save()
+    logging.info("Feed cache: %d fetches, %d hergebruikt", FEED_CACHE.misses, FEED_CACHE.hits)
 
     logging.info("=== Photo Accounts run voltooid ===")
 
 
+def main():
+    run_main(main_async)
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
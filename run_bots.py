@@ -0,0 +1,121 @@
+from bsky_bot.startup import log_importtime_report, log_startup_times, timed_import  # eerst: meet de rest van de startup
+
+import sys
+import asyncio
+import logging
+import argparse
+from types import ModuleType
+from typing import List
+
+from bsky_bot.accounts import has_credentials
+from bsky_bot.logs import setup_logging
+from bsky_bot.metrics import export_metrics
+from bsky_bot.context import CURRENT_ACCOUNT
+from bsky_bot.transport import log_connection_stats
+
+# ----------------------------
+# CONFIG
+# ----------------------------
+# Alle jobs draaien in één proces: sessies (1 login per account), rate budgets,
+# HTTP-verbindingen en opgehaalde feeds worden gedeeld i.p.v. per script opnieuw opgebouwd.
+# Job -> module; modules worden pas geladen als de job gekozen is.
+JOBS = {
+    "photo_accounts": "photo_accounts",
+    "hollands_glorie": "hollands_glorie",
+    "hollands_glorie_random": "hollands_glorie_random",
+}
+
+# Jobs die draaien als er geen namen op de command line staan (= de geplande run).
+# Alleen photo_accounts had een werkende schedule; de hollands_glorie jobs zijn opt-in:
+# expliciet noemen (CLI of 'jobs' input van de workflow) of hier toevoegen.
+DEFAULT_JOBS = ["photo_accounts"]
+
+# Wat --importtime meet: de runner zelf plus het (lazy) atproto deel dat een echte run laadt
+IMPORTTIME_MODULES = ["run_bots", *JOBS.values(), "bsky_bot.sessions"]
+
+setup_logging()
+
+
+def load_job(name: str) -> ModuleType:
+    return timed_import(JOBS[name])
+
+
+def dry_run(names: List[str]) -> int:
+    """
+    Laadt en controleert de config van elke job zonder in te loggen of atproto te laden.
+    Geeft het aantal problemen terug.
+    """
+    problems = 0
+    for name in names:
+        try:
+            job = load_job(name)
+        except Exception as e:
+            problems += 1
+            logging.error("Job %s: config fout: %s", name, e)
+            continue
+
+        logging.info("Job %s:", name)
+        for source in job.SOURCES:
+            logging.info("  bron %s", source)
+        if not job.SOURCES:
+            problems += 1
+            logging.error("  geen bronnen geconfigureerd")
+        for label in job.ACCOUNT_KEYS:
+            ok = has_credentials(label)
+            logging.info("  account %s: %s", label, "credentials ok" if ok else "GEEN credentials")
+            problems += 0 if ok else 1
+
+    logging.info("atproto geladen: %s", "ja" if "atproto_client" in sys.modules else "nee")
+    return problems
+
+
+async def run_jobs(names: List[str]) -> int:
+    """
+    Draai de jobs na elkaar in dezelfde event loop.
+    Een fout in één job stopt de rest niet; geeft het aantal mislukte jobs terug.
+    """
+    failed = 0
+    for name in names:
+        # logregels buiten de account-taken krijgen de jobnaam i.p.v. "main"
+        token = CURRENT_ACCOUNT.set(name)
+        try:
+            await load_job(name).main_async()
+        except Exception as e:
+            failed += 1
+            logging.exception("Job %s mislukt: %s", name, e)
+        finally:
+            CURRENT_ACCOUNT.reset(token)
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Draait de Bluesky bot-jobs in één proces.")
+    parser.add_argument("jobs", nargs="*", help=f"jobs om te draaien (standaard: {' '.join(DEFAULT_JOBS)})")
+    parser.add_argument("--dry-run", action="store_true", help="alleen config controleren, niet inloggen of posten")
+    parser.add_argument("--importtime", action="store_true", help="rapport van de duurste imports (python -X importtime)")
+    args = parser.parse_args()
+
+    names = args.jobs or DEFAULT_JOBS
+    unknown = [n for n in names if n not in JOBS]
+    if unknown:
+        parser.error(f"onbekende job(s): {', '.join(unknown)} (kies uit: {', '.join(JOBS)})")
+
+    if args.importtime:
+        log_importtime_report(IMPORTTIME_MODULES)
+        return
+
+    if args.dry_run:
+        problems = dry_run(names)
+        log_startup_times()
+        sys.exit(1 if problems else 0)
+
+    failed = asyncio.run(run_jobs(names))
+    log_startup_times()
+    log_connection_stats()
+    export_metrics()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()